@@ -1,10 +1,22 @@
-import os
+import hashlib
 import json
+import os
+import threading
+from collections import OrderedDict
+from pose_store import load_pose_store
 
 class OpenSourceAvatarGenerator:
-    def __init__(self, fps: int = 24):
+    def __init__(self, fps: int = 24, sentence_cache_size: int = 512):
         self.fps = fps
         self.pose_db = {}
+        # Each gloss's frames serialized once, as JSON without the surrounding brackets, so a response is
+        # just those segments joined; whole responses for recent glosses are kept in a small LRU on top
+        self.clip_cache = {}
+        self.sentence_cache = OrderedDict()  # normalised gloss -> (body, etag)
+        self.sentence_cache_size = sentence_cache_size
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
         self.load_pose_database()
 
     def load_pose_database(self):
@@ -12,24 +24,62 @@ class OpenSourceAvatarGenerator:
         root_dir = os.path.dirname(os.path.dirname(__file__))  # SegnoVivo
         pose_db_path = os.path.join(root_dir, "Predictor", "sequence_data", "pose_database.json")
 
+        # Memory-mapped binary copy of the JSON (pose_store.py), converted on first use and whenever the JSON changes
         try:
-            with open(pose_db_path, "r") as file:
-                self.pose_db = json.load(file)
-                print(f"✅ Loaded pose database with {len(self.pose_db)} entries.")
+            self.pose_db = load_pose_store(pose_db_path)
+            print(f"✅ Loaded pose database with {len(self.pose_db)} entries.")
         except FileNotFoundError:
             print(f"❌ pose_database.json not found at {pose_db_path}")
+        except ValueError as e:
+            # Points the binary store cannot hold (e.g. mixed coordinate counts); serve the JSON as it is
+            print(f"⚠️ Could not use the binary pose store ({e}), loading pose_database.json instead")
+            with open(pose_db_path, "r") as file:
+                self.pose_db = json.load(file)
+            print(f"✅ Loaded pose database with {len(self.pose_db)} entries.")
+        with self.lock:
+            self.clip_cache.clear()
+            self.sentence_cache.clear()
 
-    def generate(self, gloss: str):
-        frames = []
-        gloss_tokens = gloss.strip().upper().split()
-
+    def clips(self, gloss_tokens):
+        # Database glosses that make up the animation, in order
         for token in gloss_tokens:
             if token in self.pose_db:
-                frames.extend(self.pose_db[token])
+                yield token
             else:
                 # Fingerspelling fallback
                 for char in token:
                     if char in self.pose_db:
-                        frames.extend(self.pose_db[char])
+                        yield char
+
+    def generate(self, gloss: str):
+        frames = []
+        for clip in self.clips(gloss.strip().upper().split()):
+            frames.extend(self.pose_db[clip])
+        return frames
+
+    def clip_json(self, clip):
+        segment = self.clip_cache.get(clip)
+        if segment is None:
+            segment = json.dumps(self.pose_db[clip], separators=(",", ":"))[1:-1].encode()
+            self.clip_cache[clip] = segment
+        return segment
+
+    def generate_json(self, gloss: str):
+        # The /generate-avatar response body, {"frames": [...], "fps": ...}, as bytes plus an ETag for it
+        key = " ".join(gloss.strip().upper().split())
+        with self.lock:
+            cached = self.sentence_cache.get(key)
+            if cached is not None:
+                self.sentence_cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
 
-        return frames
\ No newline at end of file
+        segments = [segment for segment in map(self.clip_json, self.clips(key.split())) if segment]
+        body = b'{"frames":[' + b",".join(segments) + b'],"fps":' + str(self.fps).encode() + b"}"
+        result = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+        with self.lock:
+            self.sentence_cache[key] = result
+            while len(self.sentence_cache) > self.sentence_cache_size:
+                self.sentence_cache.popitem(last=False)
+        return result
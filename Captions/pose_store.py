@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import numpy as np
+
+# Binary, memory-mapped copy of pose_database.json.
+# All points are packed back to back into one float32 (or float16) file, pose_database.bin, and a small
+# pose_database.index.json maps every gloss to its entries as {part: [offset, count]} into that file.
+# Opening the store only reads the index and maps the points, so startup no longer depends on the size of
+# the database, and several server processes share one copy of it in the page cache.
+
+INDEX_SUFFIX = ".index.json"
+POINTS_SUFFIX = ".bin"
+# Decimals each dtype holds faithfully, used when points are turned back into JSON numbers
+DECIMALS = {"float32": 6, "float16": 4}
+
+
+def store_paths(json_path):
+    base = os.path.splitext(json_path)[0]
+    return base + INDEX_SUFFIX, base + POINTS_SUFFIX
+
+
+def temp_file(path, mode):
+    # Uniquely named, next to path, so two processes converting at once never write to the same file
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    return os.fdopen(fd, mode), temp_path
+
+
+def convert(json_path, dtype="float32"):
+    # pose_database.json -> pose_database.index.json + pose_database.bin
+    index_path, points_path = store_paths(json_path)
+    with open(json_path, "r") as file:
+        pose_db = json.load(file)
+
+    glosses = {}
+    offset = 0
+    dims = None
+    temp_paths = []
+    try:
+        out, temp_points = temp_file(points_path, "wb")
+        temp_paths.append(temp_points)
+        with out:
+            for gloss, entries in pose_db.items():
+                glosses[gloss] = []
+                for entry in entries:
+                    parts = {}
+                    for part, points in entry.items():
+                        points = np.asarray(points, dtype=dtype)
+                        if points.ndim == 2 and dims is None:
+                            dims = points.shape[1]
+                        if points.ndim != 2 or points.shape[1] != dims:
+                            raise ValueError(f"{gloss}/{part}: expected points with {dims} coordinates, got {points.shape}")
+                        out.write(points.tobytes())
+                        parts[part] = [offset, len(points)]
+                        offset += len(points)
+                    glosses[gloss].append(parts)
+
+        index = {"dtype": dtype, "dims": dims or 2, "points": offset, "glosses": glosses}
+        file, temp_index = temp_file(index_path, "w")
+        temp_paths.append(temp_index)
+        with file:
+            json.dump(index, file)
+        os.replace(temp_points, points_path)
+        os.replace(temp_index, index_path)  # Last, so a half-converted store is never picked up
+    except BaseException:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+    return PoseStore(index_path, points_path)
+
+
+class PoseStore:
+    def __init__(self, index_path, points_path):
+        with open(index_path, "r") as file:
+            index = json.load(file)
+        self.dtype = index["dtype"]
+        self.dims = index["dims"]
+        self.glosses = index["glosses"]
+        self.decimals = DECIMALS.get(self.dtype, 6)
+        expected_bytes = index["points"] * self.dims * np.dtype(self.dtype).itemsize
+        if os.path.getsize(points_path) != expected_bytes:
+            raise ValueError(f"{points_path} does not match its index")
+        if index["points"]:
+            self.points = np.memmap(points_path, dtype=self.dtype, mode="r", shape=(index["points"], self.dims))
+        else:
+            self.points = np.zeros((0, self.dims), dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.glosses)
+
+    def __contains__(self, gloss):
+        return gloss in self.glosses
+
+    def keys(self):
+        return self.glosses.keys()
+
+    def arrays(self, gloss):
+        # Zero-copy views: [{part: (count, dims) array}] per entry
+        return [{part: self.points[offset:offset + count] for part, (offset, count) in entry.items()}
+                for entry in self.glosses[gloss]]
+
+    def __getitem__(self, gloss):
+        # The same structure pose_database.json has, as plain lists
+        return [{part: points.astype(np.float64).round(self.decimals).tolist() for part, points in entry.items()}
+                for entry in self.arrays(gloss)]
+
+
+def load_pose_store(json_path, dtype="float32", verbose=True):
+    # Converts pose_database.json first if the binary store is missing or older than it
+    index_path, points_path = store_paths(json_path)
+    json_mtime = os.path.getmtime(json_path) if os.path.exists(json_path) else None
+    try:
+        if json_mtime is None or os.path.getmtime(index_path) >= json_mtime:
+            return PoseStore(index_path, points_path)
+        if verbose:
+            print("🔄 pose_database.json changed, converting it again")
+    except (OSError, KeyError, ValueError):
+        pass
+    store = convert(json_path, dtype)
+    if verbose:
+        print(f"📦 Converted {json_path} ({len(store)} glosses, {store.dtype})")
+    return store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Convert pose_database.json into a memory-mapped binary pose store")
+    parser.add_argument("--json", default=os.path.join(root_dir, "Predictor", "sequence_data", "pose_database.json"))
+    parser.add_argument("--dtype", choices=sorted(DECIMALS), default="float32",
+                        help="float16 halves the size, keeping coordinates to about 4 decimals")
+    args = parser.parse_args()
+
+    store = convert(args.json, args.dtype)
+    index_path, points_path = store_paths(args.json)
+    print(f"✅ {len(store)} glosses, {len(store.points)} points: {points_path} "
+          f"({os.path.getsize(points_path)} bytes) + {index_path}")
@@ -43,18 +43,42 @@ function injectFloatingAvatarBox() {
 }
 
 // 2. Call backend and render animation
+// Animations already fetched, by gloss, with the server's ETag: captions repeat a lot, and a matching
+// ETag gets an empty 304 back instead of the whole frame list
+const avatarCache = new Map();
+const AVATAR_CACHE_SIZE = 100;
+
+function fetchAvatarData(glossText) {
+    const cached = avatarCache.get(glossText);
+    const headers = { "Content-Type": "application/json" };
+    if (cached) headers["If-None-Match"] = cached.etag;
+
+    return fetch("http://localhost:5000/generate-avatar", {
+        method: "POST",
+        headers,
+        body: JSON.stringify({ gloss: glossText })
+    })
+    .then(res => {
+        if (res.status === 304 && cached) return cached.data;
+        return res.json().then(data => {
+            const etag = res.headers.get("ETag");
+            if (etag) {
+                avatarCache.delete(glossText);
+                avatarCache.set(glossText, { etag, data });
+                if (avatarCache.size > AVATAR_CACHE_SIZE) avatarCache.delete(avatarCache.keys().next().value);
+            }
+            return data;
+        });
+    });
+}
+
 function renderAvatarFromGloss(glossText) {
     const caption = document.getElementById("caption-text");
     const canvas = document.getElementById("avatarCanvas");
 
     if (caption) caption.textContent = glossText || "🤟";
 
-    fetch("http://localhost:5000/generate-avatar", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ gloss: glossText })
-    })
-    .then(res => res.json())
+    fetchAvatarData(glossText)
     .then(data => {
         if (!data.frames || data.frames.length === 0) {
             caption.textContent = "⚠️ No animation data found";
@@ -1,9 +1,9 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
 from avatar_generator import OpenSourceAvatarGenerator
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag"])
 
 generator = OpenSourceAvatarGenerator()
 
@@ -11,11 +11,14 @@ generator = OpenSourceAvatarGenerator()
 def generate_avatar():
     data = request.get_json()
     gloss = data.get("gloss", "")
-    frames = generator.generate(gloss)
-    return jsonify({
-        "frames": frames,
-        "fps": generator.fps
-    })
+    # Pre-serialized body; a client that sends back the ETag it already has gets an empty 304
+    body, etag = generator.generate_json(gloss)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
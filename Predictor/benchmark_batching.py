@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Compares one training epoch with the old padded X array against length-bucketed batches
+# and the streaming tf.data pipeline (with augmentation).
+# Each mode runs in its own process so the peak RSS numbers do not leak into each other.
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_mode(mode, epochs, batch_size, buckets):
+    import numpy as np
+    import tensorflow as tf
+    from train_model import load_training_data, pad_to_max_length, build_model
+    from bucketing import BucketedBatches
+
+    store, index_to_label = load_training_data()
+    num_classes = len(index_to_label)
+
+    epoch_times = []
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            epoch_times.append(time.perf_counter() - self.start)
+
+    if mode == "padded":
+        X = pad_to_max_length(store)
+        y = tf.keras.utils.to_categorical(store.labels, num_classes=num_classes)
+        model = build_model(store.max_length, store.num_features, num_classes)
+        frames_per_epoch = X.shape[0] * X.shape[1]
+        input_bytes = X.nbytes
+        model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=0, callbacks=[EpochTimer()])
+    elif mode == "streamed":
+        from input_pipeline import make_dataset
+        train_data = make_dataset(store, range(len(store)), num_classes, batch_size=batch_size, num_buckets=buckets)
+        model = build_model(None, store.num_features, num_classes)
+        # Augmentation changes lengths, so count the frames actually produced by one pass
+        frames_per_epoch = sum(int(np.prod(x.shape[:2])) for x, _ in train_data)
+        input_bytes = 0  # Batches are produced on the fly by tf.data
+        model.fit(train_data, epochs=epochs, verbose=0, callbacks=[EpochTimer()])
+    else:
+        batches = BucketedBatches(store, range(len(store)), num_classes,
+                                  batch_size=batch_size, num_buckets=buckets, seed=0)
+        model = build_model(None, store.num_features, num_classes)
+        frames_per_epoch = batches.padded_frames()
+        # Only one padded batch exists at a time
+        input_bytes = max(len(b) * int(store.lengths[b].max()) for b in batches.batches) * store.num_features * 4
+        model.fit(batches, epochs=epochs, verbose=0, callbacks=[EpochTimer()])
+
+    # The first epoch includes graph tracing, so it is reported separately
+    steady = epoch_times[1:] or epoch_times
+    return {
+        "mode": mode,
+        "first_epoch_s": epoch_times[0],
+        "epoch_s": float(np.mean(steady)),
+        "frames_per_epoch": int(frames_per_epoch),
+        "real_frames": int(store.lengths.sum()),
+        "input_mb": input_bytes / (1024 * 1024),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark padded vs length-bucketed training")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--buckets", type=int, default=8)
+    parser.add_argument("--mode", choices=["padded", "bucketed", "streamed"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.epochs, args.batch_size, args.buckets)))
+        return
+
+    results = []
+    for mode in ("padded", "bucketed", "streamed"):
+        print(f"⏱️ Running {mode} training for {args.epochs} epochs...")
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode,
+             "--epochs", str(args.epochs), "--batch-size", str(args.batch_size), "--buckets", str(args.buckets)],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"\n{'mode':<10}{'epoch (s)':>12}{'1st epoch (s)':>15}{'frames/epoch':>14}{'padding':>10}{'input MB':>10}{'peak RSS MB':>13}")
+    for r in results:
+        padding = 1 - r["real_frames"] / r["frames_per_epoch"]
+        print(f"{r['mode']:<10}{r['epoch_s']:>12.2f}{r['first_epoch_s']:>15.2f}{r['frames_per_epoch']:>14}"
+              f"{padding:>10.1%}{r['input_mb']:>10.1f}{r['peak_rss_mb']:>13.0f}")
+
+    padded, bucketed = results[:2]
+    print(f"\n🚀 Bucketed epochs are {padded['epoch_s'] / bucketed['epoch_s']:.2f}x faster "
+          f"and feed {padded['frames_per_epoch'] / bucketed['frames_per_epoch']:.2f}x fewer frames through the LSTM")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import re
+import threading
+import time
+import urllib.request
+import numpy as np
+import socketio
+from load_test import start_server, stop_server, wait_until_ready
+
+# How the cost of relaying one prediction grows with the number of connected clients, with
+# per-session rooms (the default) and with the old broadcast to everyone (PREDICTION_ROUTING=broadcast).
+# One predictor publishes to one subscribed frontend while N other clients sit in sessions of their own,
+# like other users of the same server. Reports the publish -> frontend latency and the server-side emit
+# time taken from /metrics, plus how many messages the bystanders received.
+
+
+def emit_seconds(url):
+    # Total and count of segnovivo_emit_seconds{source="relay"} from the Prometheus text
+    with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+        text = response.read().decode()
+    total = re.search(r'segnovivo_emit_seconds_sum\{source="relay"\} (\S+)', text)
+    count = re.search(r'segnovivo_emit_seconds_count\{source="relay"\} (\S+)', text)
+    return (float(total.group(1)), float(count.group(1))) if total and count else (0.0, 0.0)
+
+
+def connect(url, session):
+    sio = socketio.Client(reconnection=False)
+    sio.connect(f"{url}?session={session}", transports=["websocket"])
+    return sio
+
+
+def run(url, bystanders, messages, rate):
+    clients = [connect(url, f"bench-bystander-{i}") for i in range(bystanders)]
+    delivered = [0]
+    lock = threading.Lock()
+
+    def count_delivery(data):
+        with lock:
+            delivered[0] += 1
+
+    for client in clients:
+        client.on("prediction", count_delivery)
+
+    publisher = connect(url, "bench-target")
+    frontend = connect(url, "bench-target")
+    sent_at = {}
+    latencies = []
+    done = threading.Event()
+
+    @frontend.on("prediction")
+    def on_prediction(data):
+        started = sent_at.pop(data.get("gesture"), None)
+        if started is not None:
+            latencies.append(time.perf_counter() - started)
+            if len(latencies) == messages:
+                done.set()
+
+    before = emit_seconds(url)
+    for i in range(messages):
+        gesture = f"bench-{i}"
+        sent_at[gesture] = time.perf_counter()
+        publisher.emit("prediction", {"gesture": gesture, "confidence": 1.0})
+        time.sleep(1.0 / rate)
+    done.wait(10)
+    time.sleep(0.5)  # Let broadcasts to bystanders finish arriving
+    after = emit_seconds(url)
+
+    for client in clients + [publisher, frontend]:
+        client.disconnect()
+    emitted = after[1] - before[1]
+    ms = np.array(latencies) * 1000
+    return {
+        "received": len(latencies),
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else float("nan"),
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else float("nan"),
+        "emit_ms": (after[0] - before[0]) / emitted * 1000 if emitted else float("nan"),
+        "bystander_messages": delivered[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prediction fan-out against the number of connected clients")
+    parser.add_argument("--clients", default="1,10,50,100,200", help="Comma separated bystander counts")
+    parser.add_argument("--messages", type=int, default=100, help="Predictions published per run")
+    parser.add_argument("--rate", type=float, default=50, help="Predictions per second")
+    parser.add_argument("--routing", default="session,broadcast")
+    parser.add_argument("--port", type=int, default=5056)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    counts = [int(n) for n in args.clients.split(",")]
+    print(f"\n{'routing':<11}{'clients':>8}{'received':>10}{'p50 ms':>9}{'p95 ms':>9}{'emit ms':>9}{'bystander msgs':>16}")
+    for routing in args.routing.split(","):
+        server = start_server(args.port, PREDICTION_ROUTING=routing)
+        try:
+            wait_until_ready(url, 120, server)
+            for count in counts:
+                r = run(url, count, args.messages, args.rate)
+                print(f"{routing:<11}{count:>8}{r['received']:>10}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+                      f"{r['emit_ms']:>9.3f}{r['bystander_messages']:>16}", flush=True)
+        finally:
+            stop_server(server)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import time
+import numpy as np
+
+# Compares the JSON /predict endpoint with the bulk /predict_batch endpoint (JSON, raw float32
+# and msgpack bodies). Runs in-process through Flask's test client, so no server or network is needed.
+
+from connection import app, msgpack
+from sequence_store import load_sequence_store
+
+
+def sample_windows(count, frames):
+    store = load_sequence_store(verbose=False)
+    rng = np.random.default_rng(0)
+    windows = np.zeros((count, frames, store.num_features), dtype=np.float32)
+    for row, i in enumerate(rng.choice(len(store), size=count)):
+        seq = store[i][-frames:]
+        windows[row, :len(seq)] = seq
+    return windows
+
+
+def timed(fn, repeats):
+    fn()  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        sent = fn()
+    return (time.perf_counter() - start) / repeats * 1000, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /predict vs /predict_batch payloads")
+    parser.add_argument("--sequences", type=int, default=32)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    windows = sample_windows(args.sequences, args.frames)
+
+    def json_single():
+        sent = 0
+        for window in windows:
+            body = json.dumps({"sequence": window.tolist()})
+            sent += len(body)
+            client.post('/predict', data=body, content_type="application/json").get_json()
+        return sent
+
+    def json_batch():
+        body = json.dumps({"sequences": windows.tolist()})
+        client.post('/predict_batch', data=body, content_type="application/json").get_json()
+        return len(body)
+
+    def binary_batch():
+        body = windows.astype('<f4').tobytes()
+        client.post('/predict_batch', data=body, content_type="application/octet-stream",
+                    headers={"X-Shape": ",".join(map(str, windows.shape))}).get_json()
+        return len(body)
+
+    def msgpack_batch():
+        body = msgpack.packb({"shape": list(windows.shape), "data": windows.astype('<f4').tobytes()})
+        client.post('/predict_batch', data=body, content_type="application/msgpack").get_json()
+        return len(body)
+
+    cases = [("JSON /predict x N", json_single), ("JSON /predict_batch", json_batch),
+             ("float32 /predict_batch", binary_batch)]
+    if msgpack is not None:
+        cases.append(("msgpack /predict_batch", msgpack_batch))
+
+    print(f"\n{args.sequences} sequences x {args.frames} frames x {windows.shape[2]} features\n")
+    print(f"{'payload':<26}{'request bytes':>15}{'latency (ms)':>15}")
+    baseline = None
+    for name, fn in cases:
+        latency, sent = timed(fn, args.repeats)
+        baseline = baseline or (sent, latency)
+        print(f"{name:<26}{sent:>15,}{latency:>15.2f}   "
+              f"({baseline[0] / sent:.1f}x fewer bytes, {baseline[1] / latency:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
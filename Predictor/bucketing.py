@@ -0,0 +1,81 @@
+import numpy as np
+import tensorflow as tf
+
+# Length-bucketed batching.
+# Instead of padding every sequence to the longest recording in the dataset, sequences of
+# similar length are grouped into buckets and each batch is only padded to its own longest
+# sequence. Masking still ignores the zero frames, there are just far fewer of them.
+
+
+def bucket_boundaries(lengths, num_buckets=8):
+    # Quantiles of the length distribution, so every bucket holds roughly the same number of sequences
+    lengths = np.asarray(lengths)
+    if len(lengths) == 0:
+        return np.array([], dtype=np.int64)
+    quantiles = np.linspace(0, 1, num_buckets + 1)[1:]
+    return np.unique(np.ceil(np.quantile(lengths, quantiles)).astype(np.int64))
+
+
+def pad_batch(sequences, num_features, length=None):
+    # Zero-pad a list of (frames, features) arrays to the longest one (or to `length`)
+    if length is None:
+        length = max(len(seq) for seq in sequences)
+    batch = np.zeros((len(sequences), length, num_features), dtype=np.float32)
+    for row, seq in enumerate(sequences):
+        seq = seq[-length:]
+        batch[row, :len(seq)] = seq
+    return batch
+
+
+class BucketedBatches(tf.keras.utils.Sequence):
+    def __init__(self, store, indices, num_classes, batch_size=32, num_buckets=8, shuffle=True, seed=None):
+        super().__init__()
+        self.store = store
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.num_classes = num_classes
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+        lengths = store.lengths[self.indices]
+        self.boundaries = bucket_boundaries(lengths, num_buckets)
+        self.bucket_of = np.searchsorted(self.boundaries, lengths, side='left')
+        self.batches = []
+        self._make_batches()
+
+    def _make_batches(self):
+        # Shuffle inside each bucket, cut it into batches, then shuffle the batch order
+        batches = []
+        for bucket in np.unique(self.bucket_of):
+            members = self.indices[self.bucket_of == bucket]
+            if self.shuffle:
+                members = self.rng.permutation(members)
+            for start in range(0, len(members), self.batch_size):
+                batches.append(members[start:start + self.batch_size])
+        if self.shuffle:
+            order = self.rng.permutation(len(batches))
+            batches = [batches[i] for i in order]
+        self.batches = batches
+
+    def __len__(self):
+        return len(self.batches)
+
+    def __getitem__(self, i):
+        batch = self.batches[i]
+        X = pad_batch([self.store[j] for j in batch], self.store.num_features)
+        y = tf.keras.utils.to_categorical(self.store.labels[batch], num_classes=self.num_classes)
+        return X, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._make_batches()
+
+    def padded_frames(self):
+        # Total frames (real + padding) that one epoch feeds through the LSTM
+        return int(sum(len(batch) * self.store.lengths[batch].max() for batch in self.batches))
+
+    def padding_ratio(self):
+        real = int(self.store.lengths[self.indices].sum())
+        total = self.padded_frames()
+        return 1.0 - real / total if total else 0.0
+
@@ -1,18 +1,25 @@
 import cv2
 import mediapipe as mp
-import csv
 import os
 import numpy as np
+from frame_ring import FrameBuffer
+from sequence_writer import SequenceWriter
 
 mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(max_num_hands = 1)
 mp_draw = mp.solutions.drawing_utils
 
 output_dir = 'sequence_data'
-os.makedirs(output_dir, exist_ok=True)
+# Finished sequences are saved as .npy files (and listed in sequence_data/manifest.jsonl) by a
+# background thread, so the camera stays open and the next recording can start right away
+writer = SequenceWriter(output_dir)
 cap = cv2.VideoCapture(0)
 recording = False
-current_sequence = []
+labeling = False # Typing the label of the sequence just recorded, in the video window
+label_text = ""
+last_label = ""
+# Preallocated float32 frames of the current recording (grows if a take runs long); landmarks are written straight into it
+current_sequence = FrameBuffer(300)
 
 label_map_file = 'label_map.npy'
 if os.path.exists(label_map_file):
@@ -26,7 +33,18 @@ else:
     label_map = {}
     print("Created new label map")
 
-print("Press 'r' to start recording, 'e' to stop and save, 'q' to quit")
+def add_to_label_map(label):
+    for idx, name in label_map.items():
+        if name == label:
+            return
+    new_idx = len(label_map)
+    label_map[new_idx] = label
+    print(f"Added new label '{label}' with index {new_idx} to label map")
+    # Save the updated label map
+    np.save(label_map_file, label_map)
+    print(f"Saved updated label map: {label_map}")
+
+print("Press 'r' to start recording, 'e' to stop, type the label and press Enter to save, 'q' to quit")
 
 while True:
     ret, frame = cap.read()
@@ -39,68 +57,61 @@ while True:
     if results.multi_hand_landmarks:
         for hand_landmarks in results.multi_hand_landmarks:
             mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            landmarks = []
-            for lm in hand_landmarks.landmark:
-                landmarks += [lm.x, lm.y, lm.z]
             if recording:
-                current_sequence.append(landmarks)
+                current_sequence.push_landmarks(hand_landmarks)
     
     if recording:
         cv2.putText(frame, "Recording...", (10,30),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2) 
+    elif labeling:
+        hint = f" (Enter = {last_label})" if last_label and not label_text else ""
+        cv2.putText(frame, f"Label: {label_text}_{hint}", (10,30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
+        cv2.putText(frame, "Enter to save, Esc to discard", (10,65),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 1)
     
     cv2.imshow("Sequence Collector", frame)
     key = cv2.waitKey(1) & 0xFF
 
-    if key == ord('r'):
+    if labeling:
+        # Every key is part of the label until Enter or Esc
+        if key in (13, 10):
+            label = label_text.strip() or last_label
+            if label:
+                sequence_file = writer.submit(label, current_sequence.frames())
+                print(f"Saving sequence as {sequence_file}")
+                add_to_label_map(label)
+                last_label = label
+                labeling = False
+        elif key == 27:
+            print("Discarded sequence.")
+            labeling = False
+        elif key in (8, 127):
+            label_text = label_text[:-1]
+        elif 32 <= key < 127 and chr(key) != '_': # "_" separates label and id in file names
+            label_text += chr(key)
+
+    elif key == ord('r'):
         print("Start recording sequence.")
         recording = True
-        current_sequence = []
+        current_sequence.clear()
     
     elif key == ord('e') and recording:
         recording = False
-
-        cap.release()
-        cv2.destroyAllWindows()
-
-        label = input("Enter label for this sequence: ").strip()
-        sequence_file = os.path.join(output_dir, f"{label}_{len(os.listdir(output_dir))}.csv")
-
-        with open(sequence_file, mode='w', newline='') as f:
-            csv_writer = csv.writer(f)
-            for frame_landmarks in current_sequence:
-                csv_writer.writerow(frame_landmarks + [label])
-
-        print(f"Saved sequence as {sequence_file}")
-        
-    
-        label_exists = False
-        for idx, name in label_map.items():
-            if name == label:
-                label_exists = True
-                break
-                
-
-        if not label_exists:
-            new_idx = len(label_map)
-            label_map[new_idx] = label
-            print(f"Added new label '{label}' with index {new_idx} to label map")
-            # Save the updated label map
-            np.save(label_map_file, label_map)
-            print(f"Saved updated label map: {label_map}")
-
-        current_sequence = []
-
-    
-        cap = cv2.VideoCapture(0)
-        print("Press 'r' to start recording, 'e' to stop and save, 'q' to quit")
+        if len(current_sequence):
+            labeling = True
+            label_text = ""
+        else:
+            print("No hand was seen, nothing to save.")
 
     elif key == ord('q'):
         break
 
 cap.release()
 cv2.destroyAllWindows()
+writer.close()
 
 if label_map:
     np.save(label_map_file, label_map)
     print(f"Final label map saved: {label_map}")
+    print("Run 'python train_model.py --incremental' to fine-tune the model on the new recordings")
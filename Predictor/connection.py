@@ -1,55 +1,439 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
+import os
+import threading
+import time
 import numpy as np
-import tensorflow as tf
+from numpy_lstm import load_gesture_model
+from micro_batcher import MicroBatcher
+from landmark_sessions import SessionRegistry, decode_frames
+from inference_pool import InferencePool, PoolUnavailable
+from prediction_cache import PredictionCache
+from metrics import Registry, Counter, Gauge, Histogram, PhaseTimer, CONTENT_TYPE, resident_memory_bytes
+
+try:
+    import msgpack # Optional, only needed for application/msgpack bodies on /predict_batch
+except ImportError:
+    msgpack = None
 
 # Initialize app
 app = Flask(__name__)
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Load model and label map
-model = tf.keras.models.load_model('gesture_model.h5')
-label_map = np.load('label_map.npy', allow_pickle=True).item()
-max_sequence_length = model.input_shape[1]
+# Spawned inference workers re-import this module as __mp_main__. They only need inference_pool's worker
+# function, so the metrics, worker pool, batcher threads and cache below are only built in the server process
+server_process = __name__ != '__mp_main__'
+
+# Prometheus metrics, served as text at /metrics
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+if server_process:
+    metrics_registry = Registry()
+    REQUEST_PHASES = metrics_registry.register(Histogram(
+        "segnovivo_request_phase_seconds", "Time spent in each phase of a prediction request",
+        LATENCY_BUCKETS, ("endpoint", "phase")))
+    REQUESTS = metrics_registry.register(Counter(
+        "segnovivo_requests_total", "Prediction requests by endpoint and HTTP status", ("endpoint", "status")))
+    MODEL_BATCH_SIZE = metrics_registry.register(Histogram(
+        "segnovivo_model_batch_size", "Sequences per model call", (1, 2, 4, 8, 16, 32, 64, 128)))
+    MODEL_SECONDS = metrics_registry.register(Histogram(
+        "segnovivo_model_call_seconds", "Duration of one model call", LATENCY_BUCKETS))
+    SOCKET_CLIENTS = metrics_registry.register(Gauge(
+        "segnovivo_socket_clients", "Connected Socket.IO clients"))
+    EMIT_SECONDS = metrics_registry.register(Histogram(
+        "segnovivo_emit_seconds", "Time to fan a prediction out to Socket.IO clients", LATENCY_BUCKETS, ("source",)))
+    metrics_registry.register(Gauge(
+        "process_resident_memory_bytes", "Resident memory of the backend process", callback=resident_memory_bytes))
+    MODEL_READY = metrics_registry.register(Gauge(
+        "segnovivo_model_ready", "1 once the model is loaded and warmed up", callback=lambda: int(model_ready.is_set())))
+    metrics_registry.register(Gauge(
+        "segnovivo_socket_sessions", "Sessions with at least one connected client",
+        callback=lambda: len(set(client_sessions.values()))))
+    SOCKET_CLIENTS.set(0)
+
+# Model and label map. Loaded at import by default; with LAZY_MODEL_LOAD=1 the server binds first and
+# loads + warms the model in a background thread, and /ready answers 200 once predictions hit a warm path
+lazy_model_load = os.environ.get("LAZY_MODEL_LOAD", "0") == "1"
+process_started = time.perf_counter()
+model = None
+label_map = {}
+max_sequence_length = None
+stream_sessions = None
+model_ready = threading.Event()
+model_load_error = None
+seconds_to_ready = None
+first_requests_logged = set()
+
+# INFERENCE_WORKERS > 0 moves model calls into that many worker processes (started on first use)
+inference_workers = int(os.environ.get("INFERENCE_WORKERS", 0))
+inference_pool = InferencePool(inference_workers, 'gesture_model.h5') if inference_workers > 0 and server_process else None
+
+def run_model(batch):
+    MODEL_BATCH_SIZE.observe(len(batch))
+    start = time.perf_counter()
+    if inference_pool is not None:
+        predictions = inference_pool.predict(batch)
+    else:
+        predictions = model.predict(batch, verbose=0)
+    MODEL_SECONDS.observe(time.perf_counter() - start)
+    return predictions
+
+# Concurrent /predict calls are coalesced into one padded batch per model call
+predict_batcher = MicroBatcher(
+    run_model,
+    max_batch_size=int(os.environ.get("PREDICT_MAX_BATCH_SIZE", 32)),
+    max_wait_us=int(os.environ.get("PREDICT_MAX_WAIT_US", 2000)),
+    num_threads=max(1, inference_workers), # One batch in flight per worker
+) if server_process else None
+
+stream_tick_seconds = float(os.environ.get("STREAM_TICK_MS", 50)) / 1000
+stream_prediction_threshold = 0.1
+stream_loop_started = False
+
+# Near-identical windows (a hand held still) reuse the previous result; PREDICTION_CACHE_SIZE=0 turns it off
+prediction_cache_size = int(os.environ.get("PREDICTION_CACHE_SIZE", 1024))
+prediction_cache = PredictionCache(
+    maxsize=prediction_cache_size,
+    ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 2.0)),
+    precision=float(os.environ.get("PREDICTION_CACHE_PRECISION", 0.01)),
+) if prediction_cache_size > 0 and server_process else None
+
+def load_model(warm_pool=False):
+    global model, label_map, max_sequence_length, stream_sessions, model_load_error, seconds_to_ready
+    start = time.perf_counter()
+    try:
+        model = load_gesture_model('gesture_model.h5') # NumPy LSTM, no TensorFlow import needed
+        label_map = np.load('label_map.npy', allow_pickle=True).item()
+        max_sequence_length = model.input_shape[1]
+        # Clients that stream raw landmarks get a server-side ring buffer each; predictions run on the server's schedule
+        stream_sessions = SessionRegistry(
+            capacity=int(os.environ.get("STREAM_BUFFER_FRAMES", 30)),
+            num_features=model.input_shape[-1],
+            min_frames=int(os.environ.get("STREAM_MIN_FRAMES", 15)),
+            predict_every=int(os.environ.get("STREAM_PREDICT_EVERY", 10)),
+        )
+        loaded = time.perf_counter()
+        warm_up(warm_pool)
+    except Exception as e:
+        model_load_error = repr(e)
+        print(f"❌ Model failed to load: {model_load_error}")
+        if not lazy_model_load:
+            raise
+        return
+    seconds_to_ready = time.perf_counter() - process_started
+    model_ready.set()
+    print(f"🟢 Model ready: load {loaded - start:.2f}s, warmup {time.perf_counter() - loaded:.2f}s, "
+          f"{seconds_to_ready:.2f}s after start")
+
+def warm_up(warm_pool=False):
+    # One dummy padded window through the model (and every pool worker), so the first user does not pay for
+    # BLAS init, worker spawn or a stale-weights re-export. Called directly so it stays out of /metrics.
+    dummy = np.zeros((1, max_sequence_length, model.input_shape[-1]), dtype=np.float32)
+    dummy[0, :15] = 0.5 # Real frames, otherwise masking skips the whole window
+    model.predict(dummy, verbose=0)
+    if warm_pool and inference_pool is not None:
+        inference_pool.start()
+        for _ in range(inference_pool.num_workers):
+            inference_pool.predict(dummy)
+
+def not_ready_response(endpoint):
+    REQUESTS.inc(endpoint=endpoint, status=503)
+    return jsonify({"error": "Model is still loading", "ready": False}), 503
+
+def unavailable_response(endpoint, error):
+    # Every inference worker is busy or restarting; the client should retry shortly
+    print(f"⚠️ {endpoint}: {error}")
+    REQUESTS.inc(endpoint=endpoint, status=503)
+    return jsonify({"error": str(error)}), 503
+
+def log_first_request(endpoint, timer):
+    if endpoint not in first_requests_logged:
+        first_requests_logged.add(endpoint)
+        print(f"⏱️ First /{endpoint} served in {(time.perf_counter() - timer.started) * 1000:.1f} ms "
+              f"({time.perf_counter() - process_started:.2f}s after start)")
+
+def start_background_load():
+    threading.Thread(target=load_model, args=(True,), name="model-loader", daemon=True).start()
+
+# Workers load the model themselves in inference_pool.py, so only the server loads it here
+if not lazy_model_load and server_process:
+    load_model()
+elif server_process and __name__ != '__main__':
+    # Imported by a WSGI/eventlet launcher, where the __main__ block at the end never runs
+    start_background_load()
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    if model_ready.is_set():
+        return jsonify({"ready": True, "seconds_to_ready": seconds_to_ready})
+    return jsonify({"ready": False, "error": model_load_error}), 503
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    if not model_ready.is_set():
+        return not_ready_response("predict")
+    timer = PhaseTimer(REQUEST_PHASES, endpoint="predict")
     data = request.get_json()
     sequence = np.array(data['sequence'])
+    timer.mark("parse")
     if len(sequence) < max_sequence_length:
         padding = np.zeros((max_sequence_length - len(sequence), sequence.shape[1]))
         sequence = np.vstack((sequence, padding))
     else:
         sequence = sequence[-max_sequence_length:]
-    sequence = np.expand_dims(sequence, axis=0)
+    timer.mark("pad")
 
-    prediction = model.predict(sequence, verbose=0)
-    predicted_index = int(np.argmax(prediction[0]))
-    confidence = float(prediction[0][predicted_index])
+    try:
+        if prediction_cache is not None:
+            prediction = prediction_cache.get_or_compute(sequence, predict_batcher.predict)
+        else:
+            prediction = predict_batcher.predict(sequence)
+    except PoolUnavailable as e:
+        return unavailable_response("predict", e)
+    timer.mark("inference")
+    predicted_index = int(np.argmax(prediction))
+    confidence = float(prediction[predicted_index])
     gesture = label_map.get(predicted_index, "Unknown")
 
-    return jsonify({"gesture": gesture, "confidence": confidence})
+    response = jsonify({"gesture": gesture, "confidence": confidence})
+    timer.mark("serialize")
+    REQUESTS.inc(endpoint="predict", status=200)
+    log_first_request("predict", timer)
+    return response
+
+def fit_to_window(batch):
+    # Same padding/trimming as /predict, for a whole (sequences, frames, features) batch
+    count, frames, features = batch.shape
+    window = np.zeros((count, max_sequence_length, features), dtype=np.float32)
+    if frames <= max_sequence_length:
+        window[:, :frames] = batch
+        return window
+    # Clients pad short sequences with zero frames, so trim each one relative to its last real frame
+    real = np.any(batch != 0, axis=-1)
+    lengths = np.where(real.any(axis=1), frames - np.argmax(real[:, ::-1], axis=1), 0)
+    for row, length in enumerate(lengths):
+        kept = batch[row, max(0, length - max_sequence_length):length]
+        window[row, :len(kept)] = kept
+    return window
+
+def parse_shape(value):
+    shape = tuple(int(dim) for dim in value.split(","))
+    if len(shape) != 3 or min(shape) < 1:
+        raise ValueError("shape must be sequences,frames,features")
+    return shape
+
+def read_batch_payload():
+    # application/octet-stream: raw little-endian float32 in C order, shape in the X-Shape header ("n,frames,features")
+    # application/msgpack: {"shape": [n, frames, features], "data": <float32 bytes>}
+    # application/json: {"sequences": [[[...], ...], ...]} (sequences may differ in length)
+    content_type = request.mimetype
+    if content_type == "application/octet-stream":
+        shape = parse_shape(request.headers.get("X-Shape", ""))
+        return np.frombuffer(request.get_data(), dtype='<f4').reshape(shape)
+    if content_type == "application/msgpack":
+        if msgpack is None:
+            raise LookupError("msgpack is not installed on the server")
+        body = msgpack.unpackb(request.get_data())
+        shape = parse_shape(",".join(map(str, body["shape"])))  # Same checks as the X-Shape header
+        return np.frombuffer(body["data"], dtype='<f4').reshape(shape)
+    sequences = [np.asarray(seq, dtype=np.float32) for seq in request.get_json()["sequences"]]
+    batch = np.zeros((len(sequences), max(len(seq) for seq in sequences), sequences[0].shape[1]), dtype=np.float32)
+    for row, seq in enumerate(sequences):
+        batch[row, :len(seq)] = seq
+    return batch
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    # Many sequences in one request and one forward pass
+    if not model_ready.is_set():
+        return not_ready_response("predict_batch")
+    timer = PhaseTimer(REQUEST_PHASES, endpoint="predict_batch")
+    try:
+        batch = read_batch_payload()
+    except (KeyError, TypeError, ValueError, IndexError) as e:
+        # Before LookupError: KeyError and IndexError are subclasses of it
+        REQUESTS.inc(endpoint="predict_batch", status=400)
+        return jsonify({"error": f"Invalid batch payload: {e}"}), 400
+    except LookupError as e:
+        REQUESTS.inc(endpoint="predict_batch", status=415)
+        return jsonify({"error": str(e)}), 415
+    if batch.shape[-1] != model.input_shape[-1]:
+        REQUESTS.inc(endpoint="predict_batch", status=400)
+        return jsonify({"error": f"Expected {model.input_shape[-1]} features per frame"}), 400
+    timer.mark("parse")
+
+    window = fit_to_window(batch)
+    timer.mark("pad")
+    try:
+        predictions = run_model(window)
+    except PoolUnavailable as e:
+        return unavailable_response("predict_batch", e)
+    timer.mark("inference")
+
+    indices = np.argmax(predictions, axis=1)
+    confidences = predictions[np.arange(len(indices)), indices]
+    response = jsonify({"predictions": [
+        {"gesture": label_map.get(int(i), "Unknown"), "confidence": float(c)}
+        for i, c in zip(indices, confidences)
+    ]})
+    timer.mark("serialize")
+    REQUESTS.inc(endpoint="predict_batch", status=200)
+    log_first_request("predict_batch", timer)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(metrics_registry.render(), content_type=CONTENT_TYPE)
+
+@app.route('/stats/batching', methods=['GET'])
+def batching_stats():
+    return jsonify(predict_batcher.stats())
+
+@app.route('/stats/cache', methods=['GET'])
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **prediction_cache.stats()})
+
+@app.route('/stats/workers', methods=['GET'])
+def worker_stats():
+    if inference_pool is None:
+        return jsonify({"workers": 0})
+    return jsonify(inference_pool.stats())
+
+# Predictions are routed per session: a predictor (live_predict.py) and the frontends showing its output
+# connect with the same ?session=<name> (or send "subscribe" later), and a prediction only goes to that
+# session's room instead of to every client. Clients that name no session share "default", which is
+# what a single webcam setup needs. Predictors connect with ?role=predictor and stay out of the room, so
+# several cameras on one session never receive each other's predictions. PREDICTION_ROUTING=broadcast brings
+# back relaying predictions to everyone (predictions computed from a client's streamed landmarks still only
+# go back to that client).
+prediction_routing = os.environ.get("PREDICTION_ROUTING", "session")
+client_sessions = {} # sid -> session name
+predictor_sids = set()
+
+def session_room(name):
+    return f"session:{name}"
+
+def join_session(name):
+    previous = client_sessions.get(request.sid)
+    if previous is not None:
+        leave_room(session_room(previous))
+    client_sessions[request.sid] = name
+    if request.sid not in predictor_sids:
+        join_room(session_room(name))
+
+def room_for(sid):
+    # None means broadcast
+    if prediction_routing == "broadcast":
+        return None
+    return session_room(client_sessions.get(sid, "default"))
 
 @socketio.on('connect')
 def on_connect():
-    print("✅ Frontend connected via WebSocket")
+    SOCKET_CLIENTS.inc()
+    if request.args.get("role") == "predictor":
+        predictor_sids.add(request.sid)
+    join_session(request.args.get("session") or "default")
+    print(f"✅ Frontend connected via WebSocket (session {client_sessions[request.sid]})")
+
+@socketio.on("subscribe")
+def on_subscribe(data):
+    name = str((data or {}).get("session") or "default")
+    join_session(name)
+    emit("subscribed", {"session": name})
 
 @socketio.on("prediction")
 def on_prediction(data):
     gesture = data.get("gesture", "None")
     confidence = data.get("confidence", 0.0)
     print(f"📥 RECEIVED from live_predict.py: {gesture} ({confidence:.2f})")
-    emit("prediction", {"gesture": gesture, "confidence": confidence}, broadcast=True)
+    start = time.perf_counter()
+    room = room_for(request.sid)
+    if room is None:
+        emit("prediction", {"gesture": gesture, "confidence": confidence}, broadcast=True)
+    else:
+        # Only the subscribers of this predictor's session; the predictor does not need its own output back
+        emit("prediction", {"gesture": gesture, "confidence": confidence}, to=room, include_self=False)
+    EMIT_SECONDS.observe(time.perf_counter() - start, source="relay")
+
+@socketio.on("landmarks")
+def on_landmarks(data):
+    # One or more frames of 63 floats, ideally as a binary float32 message
+    global stream_loop_started
+    if not model_ready.is_set():
+        return # Frames that arrive while the model loads are dropped
+    try:
+        frames = decode_frames(data, model.input_shape[-1])
+    except (TypeError, ValueError) as e:
+        emit("stream_error", {"error": str(e)})
+        return
+    if len(frames) == 0:
+        stream_sessions.reset(request.sid) # Empty message = hand gone / sign over
+        return
+    stream_sessions.push(request.sid, frames)
+    if not stream_loop_started:
+        stream_loop_started = True
+        socketio.start_background_task(stream_prediction_loop)
+
+@socketio.on("landmarks_reset")
+def on_landmarks_reset():
+    if stream_sessions is not None:
+        stream_sessions.reset(request.sid)
+
+@socketio.on('disconnect')
+def on_disconnect():
+    SOCKET_CLIENTS.dec()
+    client_sessions.pop(request.sid, None)
+    predictor_sids.discard(request.sid)
+    if stream_sessions is not None:
+        stream_sessions.remove(request.sid)
+
+def stream_prediction_loop():
+    # Every tick, every session with enough new frames goes into one batch and one model call
+    while True:
+        sids, received, batch = stream_sessions.collect_due(max_sequence_length)
+        if sids:
+            try:
+                predictions = run_model(batch)
+            except PoolUnavailable as e:
+                print(f"⚠️ Stream predictions skipped: {e}")
+                predictions = []
+            for sid, frame, probs in zip(sids, received, predictions):
+                if sid not in client_sessions:
+                    continue # Disconnected since its frames were collected
+                predicted_index = int(np.argmax(probs))
+                confidence = float(probs[predicted_index])
+                if confidence > stream_prediction_threshold:
+                    emit_prediction(sid, label_map.get(predicted_index, "Unknown"), confidence, frame)
+        socketio.sleep(stream_tick_seconds)
 
-def emit_prediction(gesture, confidence):
+def emit_prediction(sid, gesture, confidence, frame):
+    # Back to the streaming client (live_predict.py --mode server shows it) and to the frontends of its session.
+    # These come from one client's own landmarks, so even PREDICTION_ROUTING=broadcast only sends them back to it.
+    # frame is how many frames the client had sent when the window was taken, so it can tell which one this answers
     print(f"🌐 EMITTING to frontend: {gesture} ({confidence:.2f})")
-    socketio.emit("prediction", {
-        "gesture": gesture,
-        "confidence": confidence
-    })
+    start = time.perf_counter()
+    payload = {"gesture": gesture, "confidence": confidence, "frame": frame}
+    socketio.emit("prediction", payload, to=sid)
+    room = room_for(sid)
+    if room is not None:
+        socketio.emit("prediction", payload, to=room, skip_sid=sid) # Once, if the client is also subscribed
+    EMIT_SECONDS.observe(time.perf_counter() - start, source="stream")
 
 if __name__ == '__main__':
-    print("🔌 Running backend on http://0.0.0.0:5001")
-    socketio.run(app, debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    # Workers can only be spawned once this module has finished importing, so the pool is warmed here.
+    # With the reloader (on with debug, DEBUG=0 turns both off) this block runs twice: in the parent that
+    # only watches files, and in the child it starts to serve (WERKZEUG_RUN_MAIN=true). Only the serving
+    # process loads, so workers are not started twice.
+    debug = os.environ.get("DEBUG", "1") == "1"
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        if lazy_model_load:
+            start_background_load()
+        elif inference_pool is not None:
+            warm_up(warm_pool=True)
+    port = int(os.environ.get("PORT", 5001))
+    print(f"🔌 Running backend on http://0.0.0.0:{port}")
+    # allow_unsafe_werkzeug lets the dev server start without a terminal (e.g. launched by load_test.py)
+    socketio.run(app, debug=debug, use_reloader=debug, host='0.0.0.0', port=port, allow_unsafe_werkzeug=True)
\ No newline at end of file
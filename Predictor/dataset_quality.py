@@ -0,0 +1,188 @@
+import argparse
+import json
+import time
+import numpy as np
+from sequence_store import DEFAULT_DATA_DIR, load_sequence_store
+
+# Quality report for sequence_data: near-duplicate takes, per-label outliers (possibly mislabeled or
+# botched recordings) and sequences too short to be useful.
+# Every sequence becomes one fixed-size embedding: resampled to the same number of frames, moved so the
+# average wrist position is at the origin and scaled by the hand size, so takes of the same sign recorded
+# at a different speed, place or distance from the camera end up close together. Embeddings are centred
+# on the dataset mean and L2-normalised, so a matrix product of the embeddings with themselves gives the
+# cosine similarity of every pair at once (done in blocks to keep memory flat on large datasets).
+
+EMBEDDING_FRAMES = 32
+WRIST = 0
+MIDDLE_FINGER_MCP = 9
+
+
+def resample(sequence, num_frames=EMBEDDING_FRAMES):
+    # Linear interpolation of every feature onto num_frames evenly spaced points in time
+    sequence = np.asarray(sequence, dtype=np.float32)
+    positions = np.linspace(0, len(sequence) - 1, num_frames, dtype=np.float32)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, len(sequence) - 1)
+    weight = (positions - lower)[:, np.newaxis]
+    return sequence[lower] * (1 - weight) + sequence[upper] * weight
+
+
+def embed_sequence(sequence, num_frames=EMBEDDING_FRAMES):
+    hand = resample(sequence, num_frames).reshape(num_frames, 21, 3)
+    hand = hand - hand[:, WRIST].mean(axis=0)  # Keeps the movement, drops where in the image it happened
+    size = np.median(np.linalg.norm(hand[:, MIDDLE_FINGER_MCP] - hand[:, WRIST], axis=1))
+    return (hand / max(size, 1e-6)).reshape(-1)
+
+
+def embed_store(store, num_frames=EMBEDDING_FRAMES):
+    embeddings = np.empty((len(store), num_frames * store.num_features), dtype=np.float32)
+    for i in range(len(store)):
+        embeddings[i] = embed_sequence(store[i], num_frames)
+    return embeddings
+
+
+class NeighbourIndex:
+    def __init__(self, embeddings, block_size=1024):
+        vectors = embeddings - embeddings.mean(axis=0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = vectors / np.maximum(norms, 1e-12)
+        self.block_size = block_size
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _blocks(self):
+        # (first row, cosine similarities of those rows against everything), own pair masked out
+        for start in range(0, len(self.vectors), self.block_size):
+            similarity = self.vectors[start:start + self.block_size] @ self.vectors.T
+            rows = np.arange(len(similarity))
+            similarity[rows, start + rows] = -np.inf
+            yield start, similarity
+
+    def nearest(self, k=5):
+        # Indices and similarities of each sequence's k nearest neighbours, closest first
+        k = min(k, len(self.vectors) - 1)
+        indices = np.empty((len(self.vectors), k), dtype=np.int64)
+        similarities = np.empty((len(self.vectors), k), dtype=np.float32)
+        for start, similarity in self._blocks():
+            top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+            top_similarity = np.take_along_axis(similarity, top, axis=1)
+            order = np.argsort(-top_similarity, axis=1)
+            indices[start:start + len(top)] = np.take_along_axis(top, order, axis=1)
+            similarities[start:start + len(top)] = np.take_along_axis(top_similarity, order, axis=1)
+        return indices, similarities
+
+    def pairs_above(self, threshold):
+        # Every pair (i < j) at least this similar
+        pairs = []
+        for start, similarity in self._blocks():
+            rows, cols = np.nonzero(similarity >= threshold)
+            rows = rows + start
+            keep = rows < cols
+            pairs.extend(zip(rows[keep].tolist(), cols[keep].tolist(),
+                             similarity[rows[keep] - start, cols[keep]].tolist()))
+        return sorted(pairs, key=lambda pair: -pair[2])
+
+
+def find_near_duplicates(store, index, threshold=0.999):
+    return [{"a": str(store.files[i]), "b": str(store.files[j]), "label_a": store.label(i), "label_b": store.label(j),
+             "similarity": round(similarity, 4)}
+            for i, j, similarity in index.pairs_above(threshold)]
+
+
+def find_outliers(store, index, neighbours, max_z=5.0):
+    # A sequence is flagged when it is unusually far from the centre of its own label (robust z-score of
+    # the cosine distance, median/MAD so the outliers themselves do not widen the spread), or when none of
+    # its nearest neighbours share its label; the label most of them have is given as a hint.
+    # Static handshapes are recorded almost identically every time, so a label's spread is never taken
+    # as smaller than the typical label's, or every slightly different take of a letter would stand out.
+    labels = store.labels
+    neighbour_labels = labels[neighbours]
+    distances, spreads = {}, []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        centroid = index.vectors[members].mean(axis=0)
+        centroid /= max(np.linalg.norm(centroid), 1e-12)
+        distance = 1 - index.vectors[members] @ centroid
+        distances[label] = (members, distance)
+        if len(members) >= 3:
+            spreads.append(1.4826 * np.median(np.abs(distance - np.median(distance))))
+    typical_spread = float(np.median(spreads)) if spreads else 0.0
+
+    outliers = []
+    for label, (members, distance) in distances.items():
+        spread = max(1.4826 * np.median(np.abs(distance - np.median(distance))), typical_spread)
+        z = (distance - np.median(distance)) / spread if len(members) >= 3 and spread > 0 else np.zeros(len(members))
+        for i, member_z in zip(members, z):
+            agree = int((neighbour_labels[i] == label).sum())
+            if member_z <= max_z and agree > 0:
+                continue
+            majority = np.bincount(neighbour_labels[i]).argmax()
+            outliers.append({"file": str(store.files[i]), "label": store.label(i), "z": round(float(member_z), 2),
+                             "neighbours_agreeing": agree, "looks_like": store.label_names[majority]})
+    return sorted(outliers, key=lambda o: (o["neighbours_agreeing"], -o["z"]))
+
+
+def find_short_sequences(store, min_frames=8, min_fraction=0.4):
+    # Shorter than min_frames, or much shorter than the typical take of the same label (static letters
+    # are legitimately short, a truncated take of a moving sign is not)
+    short = []
+    for label in np.unique(store.labels):
+        members = np.flatnonzero(store.labels == label)
+        typical = float(np.median(store.lengths[members]))
+        for i in members:
+            length = int(store.lengths[i])
+            if length < min_frames or length < min_fraction * typical:
+                short.append({"file": str(store.files[i]), "label": store.label(i), "frames": length,
+                              "label_median": typical})
+    return sorted(short, key=lambda s: s["frames"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate, outlying and short recordings in sequence_data")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--duplicate-threshold", type=float, default=0.999,
+                        help="Cosine similarity of a near-duplicate pair (takes of the same letter are typically ~0.99)")
+    parser.add_argument("--outlier-z", type=float, default=5.0, help="Robust z-score above which a take is an outlier")
+    parser.add_argument("--neighbours", type=int, default=5, help="Neighbours checked for label agreement")
+    parser.add_argument("--min-frames", type=int, default=8)
+    parser.add_argument("--json", help="Also write the full report to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = load_sequence_store(args.data_dir)
+    if len(store) < 2:
+        print("Not enough recordings to compare")
+        return
+    index = NeighbourIndex(embed_store(store))
+    embedded = time.perf_counter()
+    neighbours, _ = index.nearest(args.neighbours)
+    report = {
+        "near_duplicates": find_near_duplicates(store, index, args.duplicate_threshold),
+        "outliers": find_outliers(store, index, neighbours, args.outlier_z),
+        "short": find_short_sequences(store, args.min_frames),
+    }
+    finished = time.perf_counter()
+
+    print(f"\n🔁 Near-duplicates (similarity >= {args.duplicate_threshold}): {len(report['near_duplicates'])}")
+    for d in report["near_duplicates"]:
+        mismatch = "" if d["label_a"] == d["label_b"] else "   ⚠️ different labels"
+        print(f"  {d['similarity']:.4f}  {d['a']}  {d['b']}{mismatch}")
+    print(f"\n🎯 Outliers: {len(report['outliers'])}")
+    for o in report["outliers"]:
+        print(f"  {o['file']:<28} z={o['z']:>6.2f}  {o['neighbours_agreeing']}/{args.neighbours} neighbours agree"
+              f"  looks like {o['looks_like']}")
+    print(f"\n✂️ Short sequences: {len(report['short'])}")
+    for s in report["short"]:
+        print(f"  {s['file']:<28} {s['frames']:>4} frames (label median {s['label_median']:.0f})")
+    print(f"\n{len(store)} sequences, {len(store.label_names)} labels: embedded in {embedded - started:.2f}s, "
+          f"report in {finished - embedded:.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
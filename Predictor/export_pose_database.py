@@ -1,52 +1,101 @@
 import os
 import json
-import csv
 
-sequence_data_dir = os.path.join(os.path.dirname(__file__), "sequence_data")
+from sequence_store import load_sequence_store, stat_signature
+
+# Exports the longest recording of every gloss (at least 21 frames) to pose_database.json for the avatar.
+# Incremental: pose_database.manifest.json remembers which recordings (by content hash) each gloss was built
+# from, so only glosses with new, changed or removed recordings are exported again and merged into the
+# existing database (entries added by hand are kept; if the database was edited since the last export, every
+# gloss is merged into it again). Parsing the changed CSVs themselves is left to the sequence store, which
+# re-reads only those, across a process pool.
+
+sequence_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sequence_data")
 output_path = os.path.join(sequence_data_dir, "pose_database.json")
+manifest_path = os.path.join(sequence_data_dir, "pose_database.manifest.json")
+MIN_POINTS = 21
 
-pose_database = {}
-max_points_by_gloss = {}
 
-print(f"\n🔍 Scanning CSV files in: {sequence_data_dir}\n{'-'*60}")
+def load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
 
-for file_name in sorted(os.listdir(sequence_data_dir)):
-    if not file_name.endswith(".csv"):
-        continue
 
-    file_path = os.path.join(sequence_data_dir, file_name)
+def write_json(path, data, **kwargs):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, path)
 
-    # Extract gloss (e.g., Love_346.csv → Love)
-    gloss = file_name.split("_")[0].upper()
 
-    try:
-        with open(file_path, newline='') as csvfile:
-            reader = csv.reader(csvfile)
-            points = []
-            for row in reader:
-                if len(row) >= 2:
-                    try:
-                        x, y = float(row[0]), float(row[1])
-                        points.append([x, y])
-                    except:
-                        print(f"    ⚠️ Invalid float in {file_name}: {row}")
-
-            num_points = len(points)
-            if num_points >= 21:
-                if gloss not in pose_database or num_points > max_points_by_gloss[gloss]:
-                    pose_database[gloss] = [{"right_hand": points}]
-                    max_points_by_gloss[gloss] = num_points
-                    print(f"✅ Selected {file_name} → {gloss} ({num_points} points)")
-                else:
-                    print(f"ℹ️ Skipped {file_name} (only {num_points} points; {max_points_by_gloss[gloss]} is higher)")
-            else:
-                print(f"⚠️ Skipped {file_name} — only {num_points} points (< 21)")
-
-    except Exception as e:
-        print(f"❌ Failed to read {file_name}: {e}")
-
-# Save output
-with open(output_path, "w") as f:
-    json.dump(pose_database, f, indent=2)
-
-print(f"\n✅ Saved {len(pose_database)} glosses to {output_path}")
\ No newline at end of file
+def export_gloss(store, gloss, members):
+    # Returns (pose database entry or None, file it came from or None)
+    best = max(members, key=lambda i: store.lengths[i])
+    num_points = int(store.lengths[best])
+    for i in members:
+        if i != best:
+            print(f"ℹ️ Skipped {store.files[i]} (only {store.lengths[i]} points; {num_points} is higher)")
+    if num_points < MIN_POINTS:
+        print(f"⚠️ Skipped {gloss} — longest recording {store.files[best]} has only {num_points} points (< {MIN_POINTS})")
+        return None, None
+    print(f"✅ Selected {store.files[best]} → {gloss} ({num_points} points)")
+    points = store[best][:, :2].tolist()  # x, y of the wrist for every frame
+    return [{"right_hand": points}], str(store.files[best])
+
+
+def main(rebuild=False):
+    print(f"\n🔍 Scanning sequences in: {sequence_data_dir}\n{'-'*60}")
+    store = load_sequence_store(sequence_data_dir)
+
+    members_by_gloss = {}
+    for i in range(len(store)):
+        # Extract gloss (e.g., Love_346.csv → Love)
+        members_by_gloss.setdefault(store.label(i).upper(), []).append(i)
+
+    pose_database = {} if rebuild else load_json(output_path, {})
+    saved = {} if rebuild else load_json(manifest_path, {})
+    manifest = saved.get("glosses", {})
+    if not os.path.exists(output_path) or saved.get("database") != stat_signature(output_path):
+        manifest = {}  # Database missing or edited since the last export: merge every gloss into it again
+
+    changed = 0
+    for gloss in sorted(set(manifest) - set(members_by_gloss)):
+        print(f"🗑️ Removed {gloss} (no recordings left)")
+        pose_database.pop(gloss, None)
+        del manifest[gloss]
+        changed += 1
+
+    for gloss, members in members_by_gloss.items():
+        sources = {str(store.files[i]): str(store.hashes[i]) for i in members}
+        previous = manifest.get(gloss)
+        if previous is not None and previous["sources"] == sources and \
+                (previous["selected"] is None or gloss in pose_database):
+            continue
+        entry, selected = export_gloss(store, gloss, members)
+        if entry is None:
+            pose_database.pop(gloss, None)
+        else:
+            pose_database[gloss] = entry
+        manifest[gloss] = {"sources": sources, "selected": selected}
+        changed += 1
+
+    if changed == 0:
+        print(f"\n✅ {len(pose_database)} glosses already up to date in {output_path}")
+        return
+
+    # Save output (the manifest last, so an interrupted run is redone next time)
+    write_json(output_path, pose_database, indent=2)
+    write_json(manifest_path, {"database": stat_signature(output_path), "glosses": manifest}, indent=1)
+    print(f"\n✅ Saved {len(pose_database)} glosses to {output_path} ({changed} re-exported)")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the longest recording of each gloss to pose_database.json")
+    parser.add_argument("--rebuild", action="store_true", help="Export every gloss again instead of only changed ones")
+    args = parser.parse_args()
+    main(rebuild=args.rebuild)
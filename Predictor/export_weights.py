@@ -0,0 +1,112 @@
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+
+# Pulls the Masking -> LSTM -> Dense weights out of gesture_model.h5 into a small .npz file
+# that numpy_lstm.py can run without TensorFlow. Only h5py is needed to read the Keras file.
+
+DEFAULT_MODEL_PATH = 'gesture_model.h5'
+DEFAULT_WEIGHTS_PATH = 'gesture_weights.npz'
+
+
+def file_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _decode(name):
+    return name.decode() if isinstance(name, bytes) else str(name)
+
+
+def export_weights(model_path=DEFAULT_MODEL_PATH, weights_path=DEFAULT_WEIGHTS_PATH):
+    import h5py
+
+    with h5py.File(model_path, "r") as f:
+        config = json.loads(_decode(f.attrs["model_config"]))
+        weights_group = f["model_weights"] if "model_weights" in f else f
+        layers = config["config"]["layers"]
+
+        def layer_weights(layer_name):
+            group = weights_group[layer_name]
+            return [np.asarray(group[_decode(name)], dtype=np.float32) for name in group.attrs["weight_names"]]
+
+        exported = {}
+        timesteps = None
+        for layer in layers:
+            kind, layer_config = layer["class_name"], layer["config"]
+            shape = layer_config.get("batch_shape") or layer_config.get("batch_input_shape")
+            if shape is not None and timesteps is None:
+                timesteps = shape[1]
+
+            if kind == "Masking":
+                exported["mask_value"] = np.float32(layer_config["mask_value"])
+            elif kind == "LSTM":
+                if layer_config.get("activation") != "tanh" or layer_config.get("recurrent_activation") != "sigmoid":
+                    raise ValueError("Only tanh/sigmoid LSTMs are supported")
+                if layer_config.get("return_sequences") or layer_config.get("go_backwards"):
+                    raise ValueError("Only a forward LSTM returning its last state is supported")
+                kernel, recurrent_kernel, bias = layer_weights(layer_config["name"])
+                exported.update(lstm_kernel=kernel, lstm_recurrent_kernel=recurrent_kernel, lstm_bias=bias)
+            elif kind == "Dense":
+                if layer_config.get("activation") != "softmax":
+                    raise ValueError("Only a softmax Dense output layer is supported")
+                kernel, bias = layer_weights(layer_config["name"])
+                exported.update(dense_kernel=kernel, dense_bias=bias)
+            elif kind != "InputLayer":
+                raise ValueError(f"Unsupported layer {kind} in {model_path}")
+
+    missing = {"lstm_kernel", "dense_kernel"} - exported.keys()
+    if missing:
+        raise ValueError(f"{model_path} is missing layers: {sorted(missing)}")
+
+    exported.setdefault("mask_value", np.float32(np.nan))  # NaN never equals a frame, i.e. no masking
+    exported["timesteps"] = np.int32(timesteps if timesteps is not None else -1)
+    exported["source_sha1"] = np.array(file_sha1(model_path))
+
+    tmp_path = weights_path + ".tmp.npz"
+    np.savez(tmp_path, **exported)
+    os.replace(tmp_path, weights_path)
+    return weights_path
+
+
+def verify(model_path=DEFAULT_MODEL_PATH, weights_path=DEFAULT_WEIGHTS_PATH, samples=64):
+    # Compare against Keras on real recordings, padded/trimmed the same way the servers do it
+    import tensorflow as tf
+    from numpy_lstm import NumpyGestureModel, TOLERANCE
+    from sequence_store import load_sequence_store
+
+    keras_model = tf.keras.models.load_model(model_path)
+    numpy_model = NumpyGestureModel.load(weights_path)
+    window = keras_model.input_shape[1]
+
+    store = load_sequence_store(verbose=False)
+    batch = np.zeros((min(samples, len(store)), window, store.num_features), dtype=np.float32)
+    for row in range(len(batch)):
+        seq = store[row * len(store) // len(batch)][-window:]
+        batch[row, :len(seq)] = seq
+
+    expected = keras_model.predict(batch, verbose=0)
+    actual = numpy_model.predict(batch)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    agree = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1)))
+    print(f"Max abs difference: {max_diff:.2e} (tolerance {TOLERANCE:.0e}), argmax agreement: {agree:.1%}")
+    return max_diff <= TOLERANCE
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export gesture_model.h5 weights for the NumPy inference engine")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--output", default=DEFAULT_WEIGHTS_PATH)
+    parser.add_argument("--verify", action="store_true", help="Check the NumPy engine against model.predict (needs TensorFlow)")
+    args = parser.parse_args()
+
+    export_weights(args.model, args.output)
+    print(f"✅ Exported {args.model} → {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+    if args.verify:
+        if verify(args.model, args.output):
+            print("✅ NumPy engine matches model.predict")
+        else:
+            print("❌ NumPy engine differs from model.predict")
+            raise SystemExit(1)
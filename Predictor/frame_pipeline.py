@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import deque
+
+# Bounded hand-off between the stages of the live pipeline (capture -> landmarks -> inference -> display).
+# When a consumer falls behind, put() throws away the oldest queued item instead of blocking the
+# producer, so the camera keeps running and the slow stage always works on the freshest frame.
+# With drop_oldest=False put() blocks instead (replaying a file, where every frame matters).
+
+
+class QueueClosed(Exception):
+    pass
+
+
+class DropOldestQueue:
+    def __init__(self, maxsize, drop_oldest=True):
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self.cond:
+            if self.drop_oldest:
+                if len(self.items) >= self.maxsize:
+                    self.items.popleft()
+                    self.dropped += 1
+            else:
+                self.cond.wait_for(lambda: len(self.items) < self.maxsize or self.closed)
+            self.items.append(item)
+            self.put_count += 1
+            self.cond.notify_all()
+
+    def get(self):
+        # Raises QueueClosed once the queue is closed and drained
+        with self.cond:
+            self.cond.wait_for(lambda: self.items or self.closed)
+            if not self.items:
+                raise QueueClosed()
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def close(self):
+        # Called by the producer when its stage stops; consumers drain what is left and then stop too
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get()
+            except QueueClosed:
+                return
+
+
+class StageCounter:
+    # Items per second through one stage, for the summary printed on exit
+    def __init__(self):
+        self.count = 0
+        self.started = time.perf_counter()
+
+    def tick(self):
+        self.count += 1
+
+    def fps(self):
+        elapsed = time.perf_counter() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
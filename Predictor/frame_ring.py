@@ -0,0 +1,98 @@
+import numpy as np
+
+# Fixed-capacity float32 history of landmark frames.
+# Every frame is stored twice, at slot and slot + capacity, so the newest N frames are always one
+# contiguous block of the backing array: last(n) is a view, not a copy, and pushing a frame never
+# allocates. Views stay valid until the slots they cover are overwritten, `capacity` pushes later.
+
+
+class FrameRing:
+    def __init__(self, capacity, num_features=63):
+        self.capacity = capacity
+        self.num_features = num_features
+        self.data = np.zeros((2 * capacity, num_features), dtype=np.float32)
+        self.next = 0  # Slot the next frame is written to
+        self.count = 0  # Frames held, up to capacity
+
+    def __len__(self):
+        return self.count
+
+    def is_full(self):
+        return self.count == self.capacity
+
+    def clear(self):
+        self.next = 0
+        self.count = 0
+
+    def _advance(self):
+        self.data[self.next + self.capacity] = self.data[self.next]
+        self.next = (self.next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def push(self, frame):
+        self.data[self.next] = frame
+        self._advance()
+
+    def push_landmarks(self, hand_landmarks):
+        # MediaPipe landmarks go straight into the next slot, without an intermediate Python list of floats
+        write_landmarks(hand_landmarks, self.data[self.next])
+        self._advance()
+
+    def extend(self, frames):
+        for frame in frames[-self.capacity:]:
+            self.push(frame)
+
+    def last(self, n=None):
+        # Newest min(n, count) frames, oldest first, as a view into the ring
+        n = self.count if n is None else min(n, self.count)
+        end = self.next + self.capacity
+        return self.data[end - n:end]
+
+    def window_into(self, out):
+        # Newest frames at the start of a preallocated window; the rest is left as it was (zero padding)
+        frames = self.last(len(out))
+        out[:len(frames)] = frames
+        return len(frames)
+
+
+class FrameBuffer:
+    # Growable float32 frames for a recording of unknown length (collecting_sign_data.py). Starts with
+    # room for `capacity` frames and doubles when full, so every frame is kept and a push only allocates
+    # on the rare doubling. frames() is a view of what has been recorded so far.
+    def __init__(self, capacity=300, num_features=63):
+        self.data = np.zeros((capacity, num_features), dtype=np.float32)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def _next_slot(self):
+        if self.count == len(self.data):
+            grown = np.zeros((2 * len(self.data), self.data.shape[1]), dtype=np.float32)
+            grown[:self.count] = self.data
+            self.data = grown
+        self.count += 1
+        return self.data[self.count - 1]
+
+    def push(self, frame):
+        self._next_slot()[:] = frame
+
+    def push_landmarks(self, hand_landmarks):
+        write_landmarks(hand_landmarks, self._next_slot())
+
+    def frames(self):
+        return self.data[:self.count]
+
+
+def write_landmarks(hand_landmarks, out):
+    # x, y, z of each of the 21 landmarks, in the order the sequence CSVs use, written one by one
+    i = 0
+    for lm in hand_landmarks.landmark:
+        out[i] = lm.x
+        out[i + 1] = lm.y
+        out[i + 2] = lm.z
+        i += 3
+    return out
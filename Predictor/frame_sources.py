@@ -0,0 +1,87 @@
+import os
+import cv2
+from sequence_store import list_sequences, read_sequence_file
+
+# Where live_predict.py gets its frames from. Every source has the cv2.VideoCapture read()/release()
+# interface, so the pipeline does not care whether it runs on the webcam, a recorded video, a folder
+# of images or recorded landmark sequences from sequence_data (which skip hand detection: each "frame"
+# is already a row of 63 landmark values, or None when the hand is out of view).
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class VideoSource:
+    provides_landmarks = False
+
+    def __init__(self, device_or_path):
+        self.cap = cv2.VideoCapture(device_or_path)
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource:
+    provides_landmarks = False
+
+    def __init__(self, directory):
+        self.paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.position = 0
+
+    def read(self):
+        while self.position < len(self.paths):
+            frame = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        pass
+
+
+class LandmarkSequenceSource:
+    provides_landmarks = True
+
+    def __init__(self, sources, gap_frames=5):
+        # sources: (path, sha1 or None) per sequence, CSV or .npy.
+        # gap_frames empty frames after each sequence look like the hand leaving the camera, which
+        # ends the sign the same way it does live (stream mode resets its LSTM state on it)
+        self.sources = list(sources)
+        self.gap_frames = gap_frames
+        self.frames = self._frames()
+
+    def _frames(self):
+        for path, sha1 in self.sources:
+            yield from read_sequence_file(path, sha1)
+            for _ in range(self.gap_frames):
+                yield None
+
+    def read(self):
+        for frame in self.frames:
+            return True, frame
+        return False, None
+
+    def release(self):
+        pass
+
+
+def open_source(spec):
+    # "0" (or any integer) is a camera; a .csv / .npy recording or a sequence_data style directory
+    # (CSVs and/or manifest.jsonl) replays recorded landmarks; a directory of images is read in name
+    # order; anything else is opened as a video file
+    if spec.isdigit():
+        return VideoSource(int(spec))
+    if os.path.isdir(spec):
+        sequences = list_sequences(spec)
+        if sequences:
+            return LandmarkSequenceSource((os.path.join(spec, name), sha1) for name, _, sha1 in sequences)
+        return ImageDirectorySource(spec)
+    if spec.lower().endswith((".csv", ".npy")):
+        return LandmarkSequenceSource([(spec, None)])
+    if not os.path.exists(spec):
+        raise FileNotFoundError(spec)
+    return VideoSource(spec)
@@ -0,0 +1,108 @@
+import numpy as np
+
+# When to run the model, and what to do with its output.
+# MotionGate skips inference while no hand is visible or the hand has barely moved since the last
+# prediction (a held handshape is re-checked every max_interval frames). PredictionSmoother averages
+# recent probability vectors and only switches label with hysteresis, so a single noisy frame cannot
+# make the output flicker, and reports a change only when the stable label actually changes.
+
+
+def motion_energy(frame, previous):
+    # Mean x/y distance the 21 landmarks moved, in normalised image units (z is too noisy to help)
+    delta = (frame - previous).reshape(-1, 3)[:, :2]
+    return float(np.sqrt((delta * delta).sum(axis=1)).mean())
+
+
+class MotionGate:
+    def __init__(self, min_frames=15, min_interval=5, max_interval=30, motion_threshold=0.05):
+        self.min_frames = min_frames
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold
+        self.previous = None  # Copy of the last frame, allocated once
+        self.reset()
+        self.frames_seen = 0
+        self.inferences = 0
+
+    def reset(self):
+        # Hand gone: the next sign starts from scratch
+        self.has_previous = False
+        self.hand_frames = 0
+        self.since_inference = None  # None until the first prediction of this sign
+        self.motion = 0.0
+
+    def update(self, landmarks):
+        # Feed every frame (None when no hand); returns True when the model should run on this one
+        self.frames_seen += 1
+        if landmarks is None:
+            return False
+        if self.has_previous:
+            self.motion += motion_energy(landmarks, self.previous)
+        if self.previous is None:
+            self.previous = np.empty(len(landmarks), dtype=np.float32)
+        self.previous[:] = landmarks
+        self.has_previous = True
+        self.hand_frames += 1
+        if self.since_inference is not None:
+            self.since_inference += 1
+
+        if self.hand_frames < self.min_frames:
+            due = False
+        elif self.since_inference is None:
+            due = True  # First prediction as soon as there are enough frames
+        else:
+            due = self.since_inference >= self.min_interval and (
+                self.motion >= self.motion_threshold or self.since_inference >= self.max_interval)
+        if due:
+            self.since_inference = 0
+            self.motion = 0.0
+            self.inferences += 1
+        return due
+
+
+class PredictionSmoother:
+    def __init__(self, alpha=0.5, enter_threshold=0.4, exit_threshold=0.2, min_stable=2):
+        # alpha: weight of the newest prediction in the moving average
+        # enter_threshold / min_stable: to replace the current label, another one must lead with at least this
+        # smoothed confidence this many updates in a row
+        # exit_threshold: the current label is kept until its smoothed confidence drops below this
+        self.alpha = alpha
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_stable = min_stable
+        self.reset()
+        self.changes = 0
+
+    def reset(self):
+        self.average = None
+        self.label = None
+        self.candidate = None
+        self.candidate_count = 0
+
+    def update(self, probabilities):
+        # Returns (label index or None, smoothed confidence of that label, True if the label just changed)
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if self.average is None:
+            self.average = probabilities.copy()
+        else:
+            self.average += self.alpha * (probabilities - self.average)
+
+        leader = int(np.argmax(self.average))
+        if leader != self.label and self.average[leader] >= self.enter_threshold:
+            self.candidate_count = self.candidate_count + 1 if leader == self.candidate else 1
+            self.candidate = leader
+        else:
+            self.candidate, self.candidate_count = None, 0
+
+        changed = False
+        # Settling on a first label takes one confident prediction; switching away from one takes min_stable
+        needed = 1 if self.label is None else self.min_stable
+        if self.candidate is not None and self.candidate_count >= needed:
+            self.label, changed = self.candidate, True
+            self.candidate, self.candidate_count = None, 0
+        elif self.label is not None and self.average[self.label] < self.exit_threshold:
+            self.label, changed = None, True
+        if changed:
+            self.changes += 1
+        confidence = float(self.average[self.label]) if self.label is not None else 0.0
+        return self.label, confidence, changed
@@ -0,0 +1,207 @@
+import argparse
+import multiprocessing
+import queue
+import threading
+import time
+
+# Pool of inference worker processes.
+# Each worker loads the gesture model once and serves batches sent over its own pipe, so
+# predictions are no longer serialised through the one Python interpreter running Flask.
+# A worker that dies (or stops answering) is replaced and the batch is retried on the new one.
+
+
+def _worker_main(conn, model_path, weights_path):
+    from numpy_lstm import load_gesture_model
+
+    try:
+        model = load_gesture_model(model_path, weights_path)
+        conn.send(("ready", model.input_shape))
+        while True:
+            batch = conn.recv()
+            if batch is None:
+                break
+            try:
+                conn.send((True, model.predict(batch, verbose=0)))
+            except Exception as e:
+                conn.send((False, repr(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+class PoolUnavailable(RuntimeError):
+    # No worker could take the batch: all busy past the timeout, or the slots are failing to restart
+    pass
+
+
+class _Worker:
+    def __init__(self, slot, process, conn):
+        self.slot = slot
+        self.process = process
+        self.conn = conn
+        self.retry_at = 0.0  # After a failed restart, when the slot may try again
+        self.backoff = 0.0
+
+
+class InferencePool:
+    def __init__(self, num_workers, model_path='gesture_model.h5', weights_path=None, timeout=10.0, max_backoff=30.0):
+        self.num_workers = num_workers
+        self.model_path = model_path
+        self.weights_path = weights_path
+        self.timeout = timeout  # For a worker's answer, and for a worker to become free
+        self.max_backoff = max_backoff
+        # spawn behaves the same on macOS and Linux and does not fork Flask's threads
+        self.ctx = multiprocessing.get_context("spawn")
+        self.idle = queue.Queue()
+        self.workers = {}
+        self.restarts = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        # Started lazily: spawned children re-import the main module, which must not start another pool
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for slot in range(self.num_workers):
+            try:
+                self.idle.put(self._spawn(slot))
+            except RuntimeError as e:
+                print(f"❌ {e}; it will be retried when a request needs it")
+                self.idle.put(_Worker(slot, None, None))  # Keeps the slot, with no process behind it
+
+    def _spawn(self, slot):
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(target=_worker_main, args=(child_conn, self.model_path, self.weights_path),
+                                   name=f"inference-worker-{slot}", daemon=True)
+        process.start()
+        child_conn.close()
+        try:
+            ready = parent_conn.poll(60) and parent_conn.recv()[0] == "ready"
+        except EOFError:
+            ready = False
+        if not ready:
+            process.kill()
+            process.join(1)
+            parent_conn.close()
+            raise RuntimeError(f"Inference worker {slot} failed to start")
+        worker = _Worker(slot, process, parent_conn)
+        with self._lock:
+            self.workers[slot] = worker
+        return worker
+
+    def _replace(self, worker):
+        if worker.process is not None:
+            print(f"♻️ Restarting inference worker {worker.slot} (exit code {worker.process.exitcode})")
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.process.join(1)
+            worker.conn.close()
+        with self._lock:
+            self.restarts += 1
+        return self._spawn(worker.slot)
+
+    def _release_replaced(self, worker):
+        # Puts a restarted worker back in the slot. If the restart fails the dead worker goes back instead,
+        # so the slot is never lost: the next request to draw it tries again once its backoff has passed
+        try:
+            self.idle.put(self._replace(worker))
+        except Exception as e:
+            worker.backoff = min(max(worker.backoff * 2, 1.0), self.max_backoff)
+            worker.retry_at = time.monotonic() + worker.backoff
+            self.idle.put(worker)
+            raise PoolUnavailable(f"Inference worker {worker.slot} could not be restarted: {e}")
+
+    def _acquire(self):
+        try:
+            worker = self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolUnavailable(f"No inference worker became free in {self.timeout}s")
+        if worker.process is not None and worker.process.is_alive():
+            return worker
+        if time.monotonic() < worker.retry_at:
+            self.idle.put(worker)
+            raise PoolUnavailable(f"Inference worker {worker.slot} is down, retrying in {worker.retry_at - time.monotonic():.1f}s")
+        self._release_replaced(worker)
+        return self._acquire()
+
+    def predict(self, batch, verbose=0):
+        # Raises PoolUnavailable when no worker can run the batch; RuntimeError if the model itself fails on it
+        self.start()
+        for attempt in range(2):
+            worker = self._acquire()
+            try:
+                worker.conn.send(batch)
+                if not worker.conn.poll(self.timeout):
+                    raise TimeoutError(f"worker {worker.slot} did not answer in {self.timeout}s")
+                ok, result = worker.conn.recv()
+            except (EOFError, OSError, TimeoutError) as e:
+                # Crashed or hung: put a fresh worker in its slot and retry the batch once
+                self._release_replaced(worker)
+                if attempt == 1:
+                    raise PoolUnavailable(f"Inference failed after restarting a worker: {e}")
+                continue
+            self.idle.put(worker)
+            if not ok:
+                raise RuntimeError(result)
+            with self._lock:
+                self.batches += 1
+            return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.num_workers,
+                "alive": sum(w.process.is_alive() for w in self.workers.values()),
+                "idle": self.idle.qsize(),
+                "restarts": self.restarts,
+                "batches": self.batches,
+            }
+
+    def close(self):
+        with self._lock:
+            workers = list(self.workers.values())
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(1)
+
+
+if __name__ == '__main__':
+    # Throughput with 1..N workers, driven by as many client threads as there are workers
+    import numpy as np
+    from sequence_store import load_sequence_store
+
+    parser = argparse.ArgumentParser(description="Benchmark inference throughput with a worker pool")
+    parser.add_argument("--max-workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--batches", type=int, default=400)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    store = load_sequence_store(verbose=False)
+    batch = np.zeros((args.batch_size, 56, store.num_features), dtype=np.float32)
+    for row in range(args.batch_size):
+        seq = store[row][-30:]
+        batch[row, :len(seq)] = seq
+
+    for workers in sorted({1, 2, 4, args.max_workers} & set(range(1, args.max_workers + 1))):
+        pool = InferencePool(workers)
+        pool.start()
+        per_thread = args.batches // workers
+
+        def client():
+            for _ in range(per_thread):
+                pool.predict(batch)
+
+        threads = [threading.Thread(target=client) for _ in range(workers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>2} workers: {per_thread * workers * args.batch_size / elapsed:>8.0f} sequences/s")
+        pool.close()
@@ -0,0 +1,72 @@
+import numpy as np
+import tensorflow as tf
+
+from bucketing import bucket_boundaries
+
+# Streaming training input built on tf.data.
+# Only sequence indices are shuffled; frames are read lazily from the memory-mapped store,
+# augmented in parallel map stages, bucketed by length and prefetched, so host memory stays
+# flat however many recordings sequence_data grows to.
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def time_warp(frames, min_rate=0.8, max_rate=1.2):
+    # Resample the sequence to a random speed with linear interpolation between frames
+    length = tf.shape(frames)[0]
+    rate = tf.random.uniform([], min_rate, max_rate)
+    new_length = tf.maximum(2, tf.cast(tf.round(tf.cast(length, tf.float32) * rate), tf.int32))
+    positions = tf.linspace(0.0, tf.cast(length - 1, tf.float32), new_length)
+    lower = tf.cast(tf.floor(positions), tf.int32)
+    upper = tf.minimum(lower + 1, length - 1)
+    weight = (positions - tf.cast(lower, tf.float32))[:, None]
+    return tf.gather(frames, lower) * (1.0 - weight) + tf.gather(frames, upper) * weight
+
+
+def mirror(frames, probability=0.5):
+    # Landmarks are normalised image coordinates, so a horizontal flip is x -> 1 - x
+    num_features = frames.shape[-1]
+    x_mask = tf.constant([1.0, 0.0, 0.0] * (num_features // 3), dtype=frames.dtype)
+    mirrored = frames * (1.0 - 2.0 * x_mask) + x_mask
+    return tf.where(tf.random.uniform([]) < probability, mirrored, frames)
+
+
+def jitter(frames, stddev=0.002):
+    return frames + tf.random.normal(tf.shape(frames), stddev=stddev, dtype=frames.dtype)
+
+
+def augment_sequence(frames):
+    return jitter(mirror(time_warp(frames)))
+
+
+def make_dataset(store, indices, num_classes, batch_size=32, num_buckets=8, augment=True, shuffle=True, labels=None):
+    # `labels` maps every store sequence to a class index; it defaults to the store's own label order
+    indices = np.asarray(indices, dtype=np.int64)
+    num_features = store.num_features
+    labels = tf.constant(store.labels if labels is None else labels, dtype=tf.int32)
+
+    def read_sequence(i):
+        # Copy one recording out of the memmap; nothing else is held in memory
+        return np.array(store[i], dtype=np.float32)
+
+    def load(i):
+        frames = tf.numpy_function(read_sequence, [i], tf.float32)
+        frames.set_shape([None, num_features])
+        return frames, tf.gather(labels, i)
+
+    ds = tf.data.Dataset.from_tensor_slices(indices)
+    if shuffle:
+        ds = ds.shuffle(len(indices), reshuffle_each_iteration=True)
+    ds = ds.map(load, num_parallel_calls=AUTOTUNE)
+    if augment:
+        ds = ds.map(lambda x, y: (augment_sequence(x), y), num_parallel_calls=AUTOTUNE)
+    ds = ds.map(lambda x, y: (x, tf.one_hot(y, num_classes)), num_parallel_calls=AUTOTUNE)
+
+    # tf.data boundaries are exclusive upper bounds, bucketing.py's are inclusive
+    boundaries = [int(b) + 1 for b in bucket_boundaries(store.lengths[indices], num_buckets)[:-1]]
+    ds = ds.bucket_by_sequence_length(
+        element_length_func=lambda x, y: tf.shape(x)[0],
+        bucket_boundaries=boundaries,
+        bucket_batch_sizes=[batch_size] * (len(boundaries) + 1),
+    )
+    return ds.prefetch(AUTOTUNE)
@@ -0,0 +1,96 @@
+import threading
+import time
+import numpy as np
+from frame_ring import FrameRing
+
+# Server-side state for clients that stream raw landmarks instead of running the model themselves.
+# Every session owns a preallocated FrameRing of its most recent frames; the server decides
+# when to run predictions and batches all sessions that are due into a single model call.
+
+
+class LandmarkSession:
+    def __init__(self, sid, capacity, num_features):
+        self.sid = sid
+        self.frames = FrameRing(capacity, num_features)
+        self.pending = 0  # Frames received since the last prediction
+        self.last_seen = time.monotonic()
+
+    @property
+    def count(self):
+        return len(self.frames)
+
+    def push(self, frames):
+        self.frames.extend(frames)
+        self.pending += len(frames)
+        self.last_seen = time.monotonic()
+
+    def reset(self):
+        self.frames.clear()
+        self.pending = 0
+
+    def window_into(self, out):
+        # Newest min(count, len(out)) frames, oldest first, into the start of out; the rest stays zero padding
+        return self.frames.window_into(out)
+
+
+class SessionRegistry:
+    def __init__(self, capacity, num_features, min_frames=15, predict_every=10, idle_timeout=30.0):
+        self.capacity = capacity
+        self.num_features = num_features
+        self.min_frames = min_frames
+        self.predict_every = predict_every
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.received = {}  # sid -> frames received on this connection, echoed with its predictions
+        self.lock = threading.Lock()
+
+    def push(self, sid, frames):
+        with self.lock:
+            session = self.sessions.get(sid)
+            if session is None:
+                session = self.sessions[sid] = LandmarkSession(sid, self.capacity, self.num_features)
+            session.push(frames)
+            self.received[sid] = self.received.get(sid, 0) + len(frames)
+
+    def reset(self, sid):
+        with self.lock:
+            if sid in self.sessions:
+                self.sessions[sid].reset()
+
+    def remove(self, sid):
+        with self.lock:
+            self.sessions.pop(sid, None)
+            self.received.pop(sid, None)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def collect_due(self, window_length):
+        # Copy the window of every session that has enough new frames into one padded batch.
+        # Also returns, per session, how many frames it had sent when its window was taken
+        now = time.monotonic()
+        with self.lock:
+            for sid in [sid for sid, s in self.sessions.items() if now - s.last_seen > self.idle_timeout]:
+                del self.sessions[sid]
+            due = [s for s in self.sessions.values()
+                   if s.count >= self.min_frames and s.pending >= self.predict_every]
+            batch = np.zeros((len(due), window_length, self.num_features), dtype=np.float32)
+            for row, session in enumerate(due):
+                session.window_into(batch[row])
+                session.pending = 0
+            received = [self.received[s.sid] for s in due]
+        return [s.sid for s in due], received, batch
+
+
+def decode_frames(data, num_features):
+    # Binary frames are little-endian float32, any number of frames per message.
+    # JSON clients can send {"frames": [[...], ...]}, a list of frames, or a single frame.
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        frames = np.frombuffer(data, dtype='<f4')
+    else:
+        if isinstance(data, dict):
+            data = data.get("frames", [])
+        frames = np.asarray(data, dtype=np.float32)
+    if frames.size % num_features:
+        raise ValueError(f"Expected a multiple of {num_features} floats, got {frames.size}")
+    return frames.reshape(-1, num_features)
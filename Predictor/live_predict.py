@@ -1,97 +1,244 @@
+import argparse
 import cv2
-import mediapipe as mp
 import numpy as np
-import tensorflow as tf
+from numpy_lstm import load_gesture_model
+import threading
 import time
-import socketio
-
-# WebSocket client
-sio = socketio.Client()
-
-try:
-    sio.connect("http://localhost:5001")
-    print("✅ Connected to WebSocket server.")
-except Exception as e:
-    print("❌ Could not connect to WebSocket server:", e)
+import urllib.parse
+from collections import defaultdict, deque
+from frame_pipeline import DropOldestQueue, StageCounter
+from frame_ring import FrameRing
+from frame_sources import open_source
+from gesture_scheduler import MotionGate, PredictionSmoother
+from prediction_emitter import PredictionEmitter
+
+parser = argparse.ArgumentParser(description="Live gesture prediction from the webcam")
+parser.add_argument("--mode", choices=["stream", "window", "server"], default="stream",
+                    help="stream: carry LSTM state and step it every frame; window: re-run the last 30 frames; "
+                         "server: send raw landmarks to connection.py and let it run the model")
+parser.add_argument("--source", default="0",
+                    help="Camera index, video file, image directory, or a recorded sequence / directory of them (sequence_data)")
+parser.add_argument("--headless", action="store_true",
+                    help="No window; implied for landmark CSVs. Files are replayed as fast as the pipeline runs")
+parser.add_argument("--session", default="default",
+                    help="Session name on connection.py; frontends opened with ?session=<name> show this camera's predictions")
+args = parser.parse_args()
+
+# WebSocket client. Sends go through a background thread with a coalescing outbox, so a slow or
+# missing server never holds up the pipeline; it keeps reconnecting in the background.
+# role=predictor keeps other cameras' predictions on the same session from reaching this one
+emitter = PredictionEmitter(f"http://localhost:5001?session={urllib.parse.quote(args.session)}&role=predictor",
+                            max_rate=10)
 
 def send_prediction(gesture, confidence):
-    print(f"📡 SENDING: {gesture} ({confidence:.2f})")
-    sio.emit("prediction", {
-        "gesture": gesture,
-        "confidence": confidence
-    })
-
-# Load model and config
-model = tf.keras.models.load_model('gesture_model.h5')
-label_map = np.load('label_map.npy', allow_pickle=True).item()
-max_sequence_length = model.input_shape[1]
-
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(max_num_hands=1)
-mp_draw = mp.solutions.drawing_utils
+    emitter.send_prediction(gesture, confidence)
+
+if args.mode == "server":
+    # Thin client: the server keeps a ring buffer for this connection and sends predictions back
+    def on_server_prediction(data):
+        global last_prediction, confidence_score
+        last_prediction = data.get("gesture", "None")
+        confidence_score = data.get("confidence", 0.0)
+    emitter.on("prediction", on_server_prediction)
+else:
+    # Load model and config
+    model = load_gesture_model('gesture_model.h5') # NumPy LSTM, no TensorFlow import needed
+    label_map = np.load('label_map.npy', allow_pickle=True).item()
+    max_sequence_length = model.input_shape[1]
+
+cap = open_source(args.source)
+live_camera = args.source.isdigit()
+headless = args.headless or cap.provides_landmarks
+
+if not cap.provides_landmarks:
+    import mediapipe as mp # Only needed when landmarks are detected from images
+    mp_hands = mp.solutions.hands
+    hands = mp_hands.Hands(max_num_hands=1)
+    mp_draw = mp.solutions.drawing_utils
 
-cap = cv2.VideoCapture(0)
-
-frame_buffer = []
 buffer_size = 30
-prediction_interval = 10
+frame_buffer = FrameRing(buffer_size) # Window mode history; the newest frames are a view, never rebuilt
+min_frames = 15
 frame_count = 0
+sent_count = 0
+model_runs = 0
 last_prediction = "None"
 confidence_score = 0.0
-prediction_threshold = 0.1
-
-print("🎥 Live prediction started. Press 'q' to quit.")
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    frame = cv2.flip(frame, 1)
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb_frame)
+# The model runs when the hand has moved enough since the last prediction (at most every 5 frames), and a
+# held handshape is re-checked every 30 frames; nothing runs while no hand is visible. Predictions are
+# averaged and only a change of the stable label is sent, instead of every raw argmax.
+gate = MotionGate(min_frames=min_frames, min_interval=5, max_interval=30, motion_threshold=0.05)
+smoother = PredictionSmoother(alpha=0.5, enter_threshold=0.4, exit_threshold=0.2, min_stable=2)
+
+# Stream mode keeps the LSTM state between frames. It is reset when the hand has been gone for
+# reset_after_missing frames (the sign is over) or once the stream is longer than anything the
+# model was trained on, so the next sign starts from a clean state.
+# Hand frames wait in pending_frames while the motion gate is shut and are stepped through the LSTM in
+# one go when it opens, so the state is in sync whenever a prediction is made; a sign that ends before
+# the gate opens is never stepped at all.
+stream = model.stream() if args.mode == "stream" else None
+pending_frames = FrameRing(max_sequence_length) if args.mode == "stream" else None
+missing_frames = 0
+reset_after_missing = 5
+
+# Pipelined runtime: capture, landmark detection and inference each run in their own thread, joined by
+# small bounded queues that drop the oldest item when full. A slow stage then skips stale frames instead
+# of stalling the camera. The main thread only draws and shows the newest frame (imshow must stay on it).
+# Replaying a file has no real-time deadline, so there every frame is kept and a full queue blocks instead.
+capture_queue = DropOldestQueue(2, drop_oldest=live_camera)
+landmark_queue = DropOldestQueue(4, drop_oldest=live_camera)
+display_queue = DropOldestQueue(1)
+stop = threading.Event()
+counters = {"capture": StageCounter(), "landmarks": StageCounter(), "inference": StageCounter()}
+if not headless:
+    counters["display"] = StageCounter()
+gesture_latencies = deque(maxlen=100000)  # (predicted gesture, capture -> prediction seconds)
+# Landmark rows handed from the landmark thread to the inference thread. The ring holds more slots than
+# can be queued or in use at once, so a row is never overwritten before the inference stage has read it.
+landmark_rows = FrameRing(16)
+
+def capture_loop():
+    while not stop.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if not cap.provides_landmarks:
+            frame = cv2.flip(frame, 1)
+        capture_queue.put((time.perf_counter(), frame))
+        counters["capture"].tick()
+    capture_queue.close()
+
+def landmark_loop():
+    for captured, frame in capture_queue:
+        if cap.provides_landmarks:
+            landmark_queue.put((captured, frame)) # Already a landmark row (or None between sequences)
+            counters["landmarks"].tick()
+            continue
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        hand_landmarks = results.multi_hand_landmarks[0] if results.multi_hand_landmarks else None
+        landmarks = None
+        if hand_landmarks is not None:
+            landmark_rows.push_landmarks(hand_landmarks)
+            landmarks = landmark_rows.last(1)[0]
+        landmark_queue.put((captured, landmarks))
+        if not headless:
+            display_queue.put((frame, hand_landmarks))
+        counters["landmarks"].tick()
+    landmark_queue.close()
+    display_queue.close()
+
+def inference_loop():
+    global frame_count, sent_count, model_runs, missing_frames, last_prediction, confidence_score
+    for captured, landmarks in landmark_queue:
+        hand_seen = landmarks is not None
+        if hand_seen:
+            if args.mode == "server":
+                emitter.send_landmarks(landmarks)
+            elif args.mode == "stream":
+                if stream.frames + len(pending_frames) >= max_sequence_length:
+                    stream.reset()
+                    pending_frames.clear()
+                    gate.reset() # The gate must count this sign's frames from here too
+                pending_frames.push(landmarks)
+            else:
+                frame_buffer.push(landmarks)
 
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            landmarks = []
-            for lm in hand_landmarks.landmark:
-                landmarks += [lm.x, lm.y, lm.z]
-            frame_buffer.append(landmarks)
-            if len(frame_buffer) > buffer_size:
-                frame_buffer.pop(0)
-
-    frame_count += 1
-    if frame_count % prediction_interval == 0 and len(frame_buffer) >= 15:
-        sequence = np.array(frame_buffer)
-        if len(sequence) < max_sequence_length:
-            padding = np.zeros((max_sequence_length - len(sequence), sequence.shape[1]))
-            sequence = np.vstack((sequence, padding))
+        if hand_seen:
+            missing_frames = 0
         else:
-            sequence = sequence[-max_sequence_length:]
-        sequence = np.expand_dims(sequence, axis=0)
-
-        predictions = model.predict(sequence, verbose=0)
-        predicted_index = np.argmax(predictions[0])
-        confidence_score = predictions[0][predicted_index]
-
-        if confidence_score > prediction_threshold:
-            if predicted_index in label_map:
+            missing_frames += 1
+            if missing_frames == reset_after_missing:
+                if args.mode == "server":
+                    emitter.send("landmarks_reset")
+                elif stream is not None:
+                    stream.reset()
+                    pending_frames.clear()
+                gate.reset()
+                smoother.reset()
+                last_prediction, confidence_score = "None", 0.0
+
+        frame_count += 1
+        counters["inference"].tick()
+        if args.mode == "server":
+            continue
+        due = gate.update(landmarks)
+        predictions = None
+        if args.mode == "stream":
+            if due:
+                stream.extend(pending_frames.last())
+                pending_frames.clear()
+                if stream.frames >= min_frames:
+                    predictions = stream.predict()
+                    model_runs += 1
+        elif due and len(frame_buffer) >= min_frames:
+            # The NumPy LSTM stops at the last real frame, so the unpadded view predicts the same as a padded window
+            sequence = frame_buffer.last(max_sequence_length)[np.newaxis]
+            predictions = model.predict(sequence, verbose=0)[0]
+            model_runs += 1
+
+        if predictions is not None:
+            predicted_index, confidence_score, changed = smoother.update(predictions)
+            if predicted_index is None:
+                last_prediction = "None"
+            elif predicted_index in label_map:
                 last_prediction = label_map[predicted_index]
             else:
                 last_prediction = f"Unknown-{predicted_index}"
-            send_prediction(last_prediction, float(confidence_score))
-
-    cv2.putText(frame, f"Gesture: {last_prediction}", (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-    cv2.putText(frame, f"Confidence: {confidence_score:.2f}", (10, 70),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-    cv2.imshow("Live Prediction", frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-    time.sleep(0.01)
-
+            gesture_latencies.append((last_prediction, time.perf_counter() - captured))
+            if changed and predicted_index is not None:
+                send_prediction(last_prediction, confidence_score)
+                sent_count += 1
+
+threads = [threading.Thread(target=target, name=target.__name__, daemon=True)
+           for target in (capture_loop, landmark_loop, inference_loop)]
+for thread in threads:
+    thread.start()
+
+if headless:
+    print(f"🎞️ Replaying {args.source} headless ({args.mode} mode). Press Ctrl+C to stop.")
+    try:
+        threads[-1].join() # The inference stage finishes once the source runs out
+    except KeyboardInterrupt:
+        pass
+else:
+    print(f"🎥 Live prediction started ({args.mode} mode). Press 'q' to quit.")
+
+    for frame, hand_landmarks in display_queue:
+        if hand_landmarks is not None:
+            mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+        cv2.putText(frame, f"Gesture: {last_prediction}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        cv2.putText(frame, f"Confidence: {confidence_score:.2f}", (10, 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+        cv2.imshow("Live Prediction", frame)
+        counters["display"].tick()
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+stop.set()
+for thread in threads:
+    thread.join(2)
 cap.release()
-cv2.destroyAllWindows()
-sio.disconnect()
\ No newline at end of file
+if not headless:
+    cv2.destroyAllWindows()
+emitter.close()
+
+print("📊 " + ", ".join(f"{name} {counter.fps():.1f} fps" for name, counter in counters.items()))
+if args.mode == "stream":
+    print(f"🧮 LSTM stepped on {stream.steps} of {gate.frames_seen} frames, {model_runs} predictions, "
+          f"{sent_count} label changes published")
+elif args.mode == "window":
+    print(f"🧮 Model ran on {model_runs} windows over {gate.frames_seen} frames, {sent_count} label changes published")
+print(f"📡 Socket.IO: {emitter.stats()}")
+print(f"🗑️ Dropped frames: capture->landmarks {capture_queue.dropped}, landmarks->inference {landmark_queue.dropped}")
+if gesture_latencies:
+    by_gesture = defaultdict(list)
+    for gesture, seconds in gesture_latencies:
+        by_gesture[gesture].append(seconds * 1000)
+    latency_ms = np.concatenate([np.array(v) for v in by_gesture.values()])
+    print(f"⏱️ Capture to prediction: p50 {np.percentile(latency_ms, 50):.1f} ms, p95 {np.percentile(latency_ms, 95):.1f} ms")
+    print(f"{'gesture':<16}{'predictions':>12}{'p50 ms':>9}{'p95 ms':>9}")
+    for gesture, values in sorted(by_gesture.items(), key=lambda item: -len(item[1])):
+        print(f"{gesture:<16}{len(values):>12}{np.percentile(values, 50):>9.2f}{np.percentile(values, 95):>9.2f}")
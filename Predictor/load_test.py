@@ -0,0 +1,300 @@
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict, deque
+import numpy as np
+import socketio
+from sequence_store import load_sequence_store
+
+# Load generator for connection.py.
+# Every synthetic client replays recorded sequences from sequence_data at webcam frame rate, the
+# way live_predict.py would, against a server started locally on a spare port (nothing leaves
+# the machine). Three paths can be exercised:
+#   http   - window mode: POST the last 30 frames to /predict every 10 frames
+#   stream - server mode: send raw landmarks over Socket.IO and wait for the "prediction" event
+#   relay  - emit "prediction" the way live_predict.py does and time its arrival at a frontend client
+# Every client gets a session of its own. Stream predictions carry no request id, so a reply is matched
+# to the oldest frame of that session still waiting for one.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.sent = 0
+        self.errors = 0
+        self.unanswered = 0
+
+    def sent_one(self):
+        with self.lock:
+            self.sent += 1
+
+    def answered(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def failed(self, count=1):
+        with self.lock:
+            self.errors += count
+
+    def missed(self, count=1):
+        with self.lock:
+            self.unanswered += count
+
+    def report(self, name, elapsed):
+        ms = np.array(self.latencies) * 1000
+        pct = np.percentile(ms, [50, 95, 99]) if len(ms) else [float("nan")] * 3
+        error_rate = self.errors / self.sent if self.sent else 0.0
+        return (f"{name:<8}{self.sent:>9}{len(ms):>9}{len(ms) / elapsed:>10.1f}{pct[0]:>9.1f}{pct[1]:>9.1f}"
+                f"{pct[2]:>9.1f}{error_rate:>9.2%}{self.unanswered:>11}")
+
+
+def replay_frames(store, rng):
+    # Random recorded sequences back to back; the flag marks the last frame of each one
+    while True:
+        seq = store[int(rng.integers(len(store)))]
+        for i, frame in enumerate(seq):
+            yield frame, i == len(seq) - 1
+
+
+def paced(frames, fps, stop):
+    # Yields frames at the camera frame rate (or as fast as possible with --fps 0) until stop is set
+    interval = 1.0 / fps if fps > 0 else 0.0
+    next_frame = time.perf_counter()
+    for item in frames:
+        if stop.is_set():
+            return
+        if interval:
+            next_frame += interval
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield item
+
+
+def http_client(url, store, seed, args, stop, rec):
+    target = urllib.parse.urlsplit(url)
+    conn = http.client.HTTPConnection(target.hostname, target.port, timeout=args.timeout)
+    window = deque(maxlen=args.window)
+    frame_count = 0
+    for frame, last in paced(replay_frames(store, np.random.default_rng(seed)), args.fps, stop):
+        window.append(frame)
+        frame_count += 1
+        if frame_count % args.predict_every == 0 and len(window) >= args.min_frames:
+            body = json.dumps({"sequence": np.asarray(window).tolist()})
+            rec.sent_one()
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    rec.answered(time.perf_counter() - start)
+                else:
+                    rec.failed()
+            except (OSError, http.client.HTTPException):
+                rec.failed()
+                conn.close()
+        if last:
+            window.clear()
+    conn.close()
+
+
+def connect_socket(url, rec, session, role=None):
+    sio = socketio.Client(reconnection=False)
+    try:
+        sio.connect(f"{url}?session={session}" + (f"&role={role}" if role else ""))
+    except Exception:
+        rec.failed()
+        return None
+    return sio
+
+
+def stream_client(url, store, seed, args, stop, rec):
+    sio = connect_socket(url, rec, f"load-{seed}", role="predictor")
+    if sio is None:
+        return
+    # Send time of every recent frame by number; each stream prediction echoes the number of frames the
+    # server had from us when it took the window, so a reply is timed from the frame it actually answers
+    sent_at = OrderedDict()
+    expected = 0
+    answered = 0
+    lock = threading.Lock()
+
+    @sio.on("prediction")
+    def on_prediction(data):
+        nonlocal answered
+        now = time.perf_counter()
+        with lock:
+            started = sent_at.get(data.get("frame"))
+            if started is not None:
+                answered += 1
+                rec.answered(now - started)
+
+    @sio.on("stream_error")
+    def on_stream_error(data):
+        rec.failed()
+
+    frames_sent = 0
+    frames_since_reset = 0
+    for frame, last in paced(replay_frames(store, np.random.default_rng(seed)), args.fps, stop):
+        try:
+            sio.emit("landmarks", np.asarray(frame, dtype='<f4').tobytes())
+        except Exception:
+            rec.failed()
+            break
+        now = time.perf_counter()
+        frames_sent += 1
+        frames_since_reset += 1
+        with lock:
+            sent_at[frames_sent] = now
+            while now - next(iter(sent_at.values())) > args.timeout:
+                sent_at.popitem(last=False)
+        # Same rule as SessionRegistry.collect_due: first at min_frames, then every predict_every frames.
+        # Not on a recording's last frame, the reset right after it drops that prediction
+        if (not last and frames_since_reset >= args.min_frames
+                and (frames_since_reset - args.min_frames) % args.predict_every == 0):
+            rec.sent_one()
+            expected += 1
+        if last:
+            sio.emit("landmarks_reset")
+            frames_since_reset = 0
+    time.sleep(min(args.timeout, 1.0)) # Let in-flight predictions arrive
+    with lock:
+        rec.missed(max(0, expected - answered)) # Below the confidence threshold, or lost
+    sio.disconnect()
+
+
+def relay_client(url, store, seed, args, stop, rec):
+    # A predictor and a frontend subscribed to its session; the server does not echo to the sender
+    sio = connect_socket(url, rec, f"load-{seed}", role="predictor")
+    frontend = connect_socket(url, rec, f"load-{seed}")
+    if sio is None or frontend is None:
+        for client in (sio, frontend):
+            if client is not None:
+                client.disconnect()
+        return
+    prefix = f"load-{seed}-"
+    sent = {}
+
+    @frontend.on("prediction")
+    def on_prediction(data):
+        sent_at = sent.pop(data.get("gesture"), None)
+        if sent_at is not None:
+            rec.answered(time.perf_counter() - sent_at)
+
+    frame_count = 0
+    for _ in paced(replay_frames(store, np.random.default_rng(seed)), args.fps, stop):
+        frame_count += 1
+        if frame_count % args.predict_every == 0:
+            gesture = f"{prefix}{frame_count}"
+            rec.sent_one()
+            sent[gesture] = time.perf_counter()
+            try:
+                sio.emit("prediction", {"gesture": gesture, "confidence": 1.0})
+            except Exception:
+                rec.failed()
+                break
+    time.sleep(min(args.timeout, 1.0))
+    rec.missed(len(sent))
+    sio.disconnect()
+    frontend.disconnect()
+
+
+def start_server(port, **extra_env):
+    env = dict(os.environ, PORT=str(port), LAZY_MODEL_LOAD="1", **extra_env)
+    # New session so the whole group (debug reloader included) can be stopped together
+    return subprocess.Popen([sys.executable, "connection.py"], cwd=HERE, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=hasattr(os, "killpg"))
+
+
+def stop_server(process):
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    else:
+        process.terminate()
+    process.wait(10)
+
+
+def wait_until_ready(url, timeout, process=None):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/ready", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (OSError, urllib.error.HTTPError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} was not ready after {timeout}s")
+
+
+def run_path(path, url, store, args):
+    target = {"http": http_client, "stream": stream_client, "relay": relay_client}[path]
+    rec = Recorder()
+    stop = threading.Event()
+    threads = [threading.Thread(target=target, args=(url, store, seed, args, stop, rec), daemon=True)
+               for seed in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    for thread in threads:
+        thread.join(args.timeout + 5)
+    return rec.report(path, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent webcam clients against connection.py")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per path")
+    parser.add_argument("--paths", default="http,stream,relay", help="Comma separated: http, stream, relay")
+    parser.add_argument("--fps", type=float, default=30, help="Frames per second per client (0 = as fast as possible)")
+    parser.add_argument("--window", type=int, default=30, help="Frames sent per /predict call")
+    parser.add_argument("--min-frames", type=int, default=15)
+    parser.add_argument("--predict-every", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--port", type=int, default=5055, help="Port for the locally started server")
+    parser.add_argument("--url", help="Use an already running server instead of starting one")
+    args = parser.parse_args()
+
+    store = load_sequence_store(verbose=False)
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    server = None
+    if args.url is None:
+        print(f"🚀 Starting connection.py on port {args.port}...")
+        server = start_server(args.port)
+    try:
+        wait_until_ready(url, 120, server)
+        paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+        print(f"👥 {args.clients} clients at {args.fps:g} fps, {args.duration:g}s per path\n")
+        print(f"{'path':<8}{'sent':>9}{'replies':>9}{'per sec':>10}{'p50 ms':>9}{'p95 ms':>9}"
+              f"{'p99 ms':>9}{'errors':>9}{'unanswered':>11}")
+        for path in paths:
+            print(run_path(path, url, store, args), flush=True)
+    finally:
+        if server is not None:
+            stop_server(server)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+import numpy as np
+
+# Dynamic micro-batching.
+# Concurrent /predict calls are queued and a batching thread gathers them for up to
+# max_wait_us (or until max_batch_size is reached), runs one padded batch through the model
+# and hands each row back to the caller that asked for it.
+
+
+class _Request:
+    __slots__ = ("sequence", "future", "enqueued")
+
+    def __init__(self, sequence):
+        self.sequence = sequence
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_us=2000, num_threads=1, recent=1024):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1e6
+        self.queue = queue.Queue()
+
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._batch_sizes = Counter()
+        self._recent_waits = deque(maxlen=recent)  # Seconds each request sat in the queue
+
+        # More than one thread lets batches overlap when predict_fn hands them to a worker pool
+        self._threads = [threading.Thread(target=self._run, name=f"micro-batcher-{i}", daemon=True)
+                         for i in range(num_threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, sequence):
+        request = _Request(sequence)
+        self.queue.put(request)
+        return request.future
+
+    def predict(self, sequence, timeout=None):
+        # Blocks the calling request thread until its row of the batch is ready
+        return self.submit(sequence).result(timeout)
+
+    def _collect(self):
+        first = self.queue.get()
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                # Requests may differ in length; zero padding is masked by the model
+                length = max(len(r.sequence) for r in batch)
+                X = np.zeros((len(batch), length, batch[0].sequence.shape[-1]), dtype=np.float32)
+                for row, r in enumerate(batch):
+                    X[row, :len(r.sequence)] = r.sequence
+                predictions = self.predict_fn(X)
+                for row, r in enumerate(batch):
+                    r.future.set_result(predictions[row])
+            except Exception as e:
+                for r in batch:
+                    if not r.future.done():
+                        r.future.set_exception(e)
+
+            with self._lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._batch_sizes[len(batch)] += 1
+                self._recent_waits.extend(started - r.enqueued for r in batch)
+
+    def stats(self):
+        with self._lock:
+            waits_ms = np.array(self._recent_waits) * 1000
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_wait_ms": {
+                    "mean": float(waits_ms.mean()) if len(waits_ms) else 0.0,
+                    "p50": float(np.percentile(waits_ms, 50)) if len(waits_ms) else 0.0,
+                    "p95": float(np.percentile(waits_ms, 95)) if len(waits_ms) else 0.0,
+                    "max": float(waits_ms.max()) if len(waits_ms) else 0.0,
+                },
+                "queue_depth": self.queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_us": int(self.max_wait * 1e6),
+            }
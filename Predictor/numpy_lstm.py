@@ -0,0 +1,153 @@
+import os
+import numpy as np
+
+from export_weights import export_weights, file_sha1
+
+# Pure NumPy inference for the Masking -> LSTM -> Dense(softmax) gesture model.
+# Loading it costs a few milliseconds and a few MB instead of importing TensorFlow, and it
+# exposes the bits of the Keras model the servers use (input_shape and predict).
+
+TOLERANCE = 1e-5  # Max abs difference from model.predict accepted by export_weights.py --verify
+
+
+def _sigmoid(x):
+    # tanh form does not overflow for large negative inputs
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+class NumpyGestureModel:
+    def __init__(self, weights):
+        self.kernel = weights["lstm_kernel"]
+        self.recurrent_kernel = weights["lstm_recurrent_kernel"]
+        self.bias = weights["lstm_bias"]
+        self.dense_kernel = weights["dense_kernel"]
+        self.dense_bias = weights["dense_bias"]
+        self.mask_value = np.float32(weights["mask_value"])
+        self.units = self.recurrent_kernel.shape[0]
+
+        timesteps = int(weights["timesteps"])
+        self.input_shape = (None, timesteps if timesteps > 0 else None, self.kernel.shape[0])
+        self.output_shape = (None, self.dense_kernel.shape[1])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as weights:
+            return cls({key: weights[key] for key in weights.files})
+
+    def frame_mask(self, x):
+        # Same rule as keras Masking: a frame is skipped when every feature equals mask_value
+        return np.any(x != self.mask_value, axis=-1)
+
+    def step(self, x_proj, h, c):
+        # One LSTM step for a batch; x_proj already holds x @ kernel + bias. Keras gate order is i, f, c, o
+        z = x_proj + h @ self.recurrent_kernel
+        u = self.units
+        i = _sigmoid(z[:, :u])
+        f = _sigmoid(z[:, u:2 * u])
+        g = np.tanh(z[:, 2 * u:3 * u])
+        o = _sigmoid(z[:, 3 * u:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        return h, c
+
+    def run_lstm(self, x):
+        batch = x.shape[0]
+        h = np.zeros((batch, self.units), dtype=np.float32)
+        c = np.zeros((batch, self.units), dtype=np.float32)
+
+        mask = self.frame_mask(x)
+        active = np.flatnonzero(mask.any(axis=0))
+        if len(active) == 0:
+            return h, c
+        # Trailing padding never changes the state, so stop at the last real frame in the batch
+        last = active[-1] + 1
+
+        # The input half of every gate for every timestep in one matmul; only h @ U stays in the loop
+        x_proj = x[:, :last] @ self.kernel + self.bias
+        for t in range(active[0], last):
+            step_mask = mask[:, t]
+            if not step_mask.any():
+                continue
+            h_new, c_new = self.step(x_proj[:, t], h, c)
+            if step_mask.all():
+                h, c = h_new, c_new
+            else:
+                # Masked rows carry their previous state forward, like keras does
+                keep = step_mask[:, None]
+                h = np.where(keep, h_new, h)
+                c = np.where(keep, c_new, c)
+        return h, c
+
+    def dense(self, h):
+        logits = h @ self.dense_kernel + self.dense_bias
+        logits -= logits.max(axis=-1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=-1, keepdims=True)
+
+    def stream(self):
+        return LSTMStream(self)
+
+    def predict(self, x, verbose=0):
+        # verbose is accepted so this can stand in for a keras model
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 2:
+            x = x[None]
+        h, _ = self.run_lstm(x)
+        return self.dense(h)
+
+
+class LSTMStream:
+    # Keeps the LSTM hidden and cell state of one live stream, so each new frame is a single
+    # LSTM step instead of re-running the whole window. Feeding frames one by one from a reset
+    # gives the same output as predict() on those frames padded with zeros.
+    def __init__(self, model):
+        self.model = model
+        self.steps = 0  # LSTM steps run over the stream's lifetime, across resets
+        self.reset()
+
+    def reset(self):
+        self.h = np.zeros((1, self.model.units), dtype=np.float32)
+        self.c = np.zeros((1, self.model.units), dtype=np.float32)
+        self.frames = 0
+
+    def push(self, frame):
+        frame = np.asarray(frame, dtype=np.float32).reshape(1, -1)
+        if not self.model.frame_mask(frame)[0]:
+            return  # Masked frames leave the state untouched
+        x_proj = frame @ self.model.kernel + self.model.bias
+        self.h, self.c = self.model.step(x_proj, self.h, self.c)
+        self.frames += 1
+        self.steps += 1
+
+    def extend(self, frames):
+        # Several frames in order, same result as pushing them one by one; like run_lstm, the input
+        # projection of all of them is a single matmul
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, self.model.kernel.shape[0])
+        frames = frames[self.model.frame_mask(frames)]
+        if len(frames) == 0:
+            return
+        x_proj = frames @ self.model.kernel + self.model.bias
+        for t in range(len(frames)):
+            self.h, self.c = self.model.step(x_proj[t:t + 1], self.h, self.c)
+        self.frames += len(frames)
+        self.steps += len(frames)
+
+    def predict(self):
+        return self.model.dense(self.h)[0]
+
+
+def load_gesture_model(model_path='gesture_model.h5', weights_path=None):
+    # Re-export the weights whenever gesture_model.h5 has changed since the last export
+    if weights_path is None:
+        weights_path = os.path.join(os.path.dirname(model_path), 'gesture_weights.npz')
+
+    if os.path.exists(model_path):
+        stale = True
+        if os.path.exists(weights_path):
+            with np.load(weights_path) as weights:
+                stale = str(weights["source_sha1"]) != file_sha1(model_path)
+        if stale:
+            print(f"🔄 Exporting {model_path} weights to {weights_path}")
+            export_weights(model_path, weights_path)
+
+    return NumpyGestureModel.load(weights_path)
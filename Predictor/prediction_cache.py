@@ -0,0 +1,74 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Bounded LRU cache with TTL for model outputs.
+# Windows are quantised to `precision` before hashing, so a hand held still in front of the
+# camera (landmarks moving by less than the step) maps to the same key and skips the model.
+
+
+class PredictionCache:
+    def __init__(self, maxsize=1024, ttl=2.0, precision=0.01):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.precision = precision
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, window):
+        quantised = np.round(np.asarray(window, dtype=np.float32) / self.precision).astype(np.int32)
+        digest = hashlib.blake2b(quantised.tobytes(), digest_size=16)
+        digest.update(str(quantised.shape).encode())
+        return digest.digest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, window, compute):
+        key = self.key(window)
+        value = self.get(key)
+        if value is None:
+            value = compute(window)
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "precision": self.precision,
+            }
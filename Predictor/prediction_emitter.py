@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import deque
+import socketio
+
+# Socket.IO output for live_predict.py that never blocks the caller.
+# The video pipeline only drops messages into a small outbox; a background thread owns the connection,
+# sends in order, and (re)connects with backoff whenever the server is unreachable. While it waits:
+#   - a new prediction replaces one that has not been sent yet, and one equal to the last sent is skipped
+#   - landmark frames queued back to back are merged into a single binary message
+#   - predictions go out at most max_rate times per second
+#   - when the outbox is full the oldest message is dropped
+
+
+class PredictionEmitter:
+    def __init__(self, url, max_rate=10.0, outbox_size=64, max_landmark_frames=60, max_backoff=5.0):
+        self.url = url
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.outbox_size = outbox_size
+        self.max_landmark_frames = max_landmark_frames
+        self.max_backoff = max_backoff
+        self.sio = socketio.Client(reconnection=False)  # Reconnects are handled by the sender thread
+        self.outbox = deque()  # [event, payload]
+        self.cond = threading.Condition()
+        self.last_prediction = None
+        self.next_prediction_at = 0.0
+        self.closing = False
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="prediction-emitter", daemon=True)
+        self.thread.start()
+
+    @property
+    def connected(self):
+        return self.sio.connected
+
+    def on(self, event, handler):
+        self.sio.on(event, handler)
+
+    def _enqueue(self, event, payload):
+        if len(self.outbox) >= self.outbox_size:
+            self.outbox.popleft()
+            self.dropped += 1
+        self.outbox.append([event, payload])
+        self.cond.notify()
+
+    def send_prediction(self, gesture, confidence):
+        with self.cond:
+            for item in self.outbox:
+                if item[0] == "prediction":
+                    # Supersede the unsent one (or drop it, if we are back at what the server already has)
+                    if gesture == self.last_prediction:
+                        self.outbox.remove(item)
+                    else:
+                        item[1] = {"gesture": gesture, "confidence": confidence}
+                    self.coalesced += 1
+                    return
+            if gesture == self.last_prediction:
+                self.coalesced += 1
+                return
+            self._enqueue("prediction", {"gesture": gesture, "confidence": confidence})
+
+    def send_landmarks(self, frame):
+        with self.cond:
+            if self.outbox and self.outbox[-1][0] == "landmarks":
+                pending = self.outbox[-1][1]
+                pending += frame.tobytes()  # The server accepts several frames per message
+                if len(pending) > self.max_landmark_frames * frame.nbytes:
+                    del pending[:frame.nbytes]  # Only the newest frames matter after a long outage
+                    self.dropped += 1
+                self.coalesced += 1
+            else:
+                self._enqueue("landmarks", bytearray(frame.tobytes()))
+
+    def send(self, event, payload=None):
+        with self.cond:
+            self._enqueue(event, payload)
+
+    def _connect(self, backoff):
+        try:
+            self.sio.connect(self.url)
+            print("✅ Connected to WebSocket server.")
+            return 0.5
+        except Exception as e:
+            if backoff == 0.5:
+                print(f"❌ Could not connect to WebSocket server ({e}), retrying in the background")
+            time.sleep(backoff)
+            return min(backoff * 2, self.max_backoff)
+
+    def _next(self):
+        # Oldest message that may go now; predictions wait for the rate limit, landmarks do not
+        with self.cond:
+            while True:
+                if not self.outbox:
+                    if self.closing:
+                        return None
+                    self.cond.wait(0.5)
+                    continue
+                event, payload = self.outbox[0]
+                wait = self.next_prediction_at - time.monotonic() if event == "prediction" else 0
+                if wait <= 0:
+                    self.outbox.popleft()
+                    if event == "prediction":
+                        self.last_prediction = payload["gesture"]
+                        self.next_prediction_at = time.monotonic() + self.min_interval
+                    return event, payload
+                self.cond.wait(wait)
+
+    def _run(self):
+        backoff = 0.5
+        while True:
+            if not self.sio.connected:
+                if self.closing:
+                    return
+                backoff = self._connect(backoff)
+                continue
+            message = self._next()
+            if message is None:
+                return
+            event, payload = message
+            try:
+                if event == "landmarks":
+                    self.sio.emit(event, bytes(payload))
+                elif payload is None:
+                    self.sio.emit(event)
+                else:
+                    self.sio.emit(event, payload)
+                self.sent += 1
+            except Exception:
+                pass  # Lost with the connection; the next loop reconnects
+
+    def close(self, timeout=2.0):
+        # Give queued messages a moment to go out, then disconnect
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+        self.thread.join(timeout)
+        if self.sio.connected:
+            self.sio.disconnect()
+
+    def stats(self):
+        with self.cond:
+            return {"sent": self.sent, "coalesced": self.coalesced, "dropped": self.dropped, "queued": len(self.outbox)}
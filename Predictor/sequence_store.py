@@ -0,0 +1,295 @@
+import os
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Compiled, memory-mappable copy of sequence_data.
+# Every recorded sequence is packed back to back into a single float32 file (frames.f32)
+# and index.npz keeps where each one starts (offsets), how many frames it has (lengths)
+# and which label it belongs to. The store is rebuilt only when the sources change, and then
+# only the new or changed recordings are parsed again.
+# Sources are the original "<label>_<n>.csv" recordings plus the .npy sequences listed in
+# manifest.jsonl, which collecting_sign_data.py appends to (one JSON line per recording).
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sequence_data")
+STORE_DIRNAME = "compiled"
+FRAMES_FILE = "frames.f32"
+INDEX_FILE = "index.npz"
+MANIFEST_FILE = "manifest.jsonl"
+NUM_FEATURES = 63  # 21 hand landmarks * (x, y, z)
+
+
+def label_from_filename(file_name):
+    # CSV recordings are named "<label>_<n>.csv" (manifest entries carry their label explicitly)
+    return file_name.split('_')[0]
+
+
+def list_source_files(data_dir):
+    return sorted(f for f in os.listdir(data_dir) if f.endswith(".csv"))
+
+
+def read_manifest(data_dir):
+    # {"id", "file", "label", "frames", "sha1", "recorded_at"} per line; a torn last line (crash mid-append) is ignored
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def list_sequences(data_dir):
+    # (file name, label, sha1 or None) for every CSV recording and every manifest entry
+    sequences = [(f, label_from_filename(f), None) for f in list_source_files(data_dir)]
+    sequences += [(e["file"], e["label"], e.get("sha1")) for e in read_manifest(data_dir)]
+    return sequences
+
+
+def source_fingerprint(data_dir, files):
+    # Size + mtime of every source file is enough to notice added, removed or re-recorded CSVs
+    # without reading any of them.
+    digest = hashlib.sha1()
+    for file_name in files:
+        st = os.stat(os.path.join(data_dir, file_name))
+        digest.update(f"{file_name}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def sources_fingerprint(data_dir):
+    # The manifest is append-only and the files it lists are never rewritten, so its own size and
+    # mtime stand in for all of them
+    files = list_source_files(data_dir)
+    if os.path.exists(os.path.join(data_dir, MANIFEST_FILE)):
+        files.append(MANIFEST_FILE)
+    return source_fingerprint(data_dir, files)
+
+
+def read_sequence_csv(file_path):
+    df = pd.read_csv(file_path, header=None)
+    return df.iloc[:, :-1].to_numpy(dtype=np.float32)  # Drop the label column
+
+
+def file_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def read_sequence_file(path, sha1=None):
+    # .npy recordings (checked against the manifest checksum when one is given) or legacy CSVs
+    if not path.endswith(".npy"):
+        return read_sequence_csv(path)
+    if sha1 is not None and file_sha1(path) != sha1:
+        raise ValueError("checksum does not match manifest")
+    return np.load(path).astype(np.float32, copy=False)
+
+
+def stat_signature(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _read_source(args):
+    # Process pool worker: (file name, sequence or None, error message or None)
+    file_name, path, sha1 = args
+    try:
+        return file_name, read_sequence_file(path, sha1), None
+    except Exception as e:
+        return file_name, None, str(e)
+
+
+def previous_sequences(store_dir):
+    # file name -> (stat signature, sha1, index) from the last compile, so unchanged recordings can be
+    # copied out of it instead of parsed again. Stores compiled before signatures were kept give nothing.
+    try:
+        store = SequenceStore(store_dir)
+    except (OSError, KeyError, ValueError):
+        return None, {}
+    if store.signatures is None:
+        return store, {}
+    return store, {str(f): (str(sig), str(sha1), i)
+                   for i, (f, sig, sha1) in enumerate(zip(store.files, store.signatures, store.hashes))}
+
+
+def compile_store(data_dir=DEFAULT_DATA_DIR, verbose=True, workers=None, incremental=True):
+    # Incremental: a recording whose size and mtime (or, failing that, content hash) match the last compile
+    # is copied from the old frames file; only new and changed ones are parsed, spread over a process pool
+    store_dir = os.path.join(data_dir, STORE_DIRNAME)
+    os.makedirs(store_dir, exist_ok=True)
+    frames_path = os.path.join(store_dir, FRAMES_FILE)
+    index_path = os.path.join(store_dir, INDEX_FILE)
+
+    sources = list_sequences(data_dir)
+    fingerprint = sources_fingerprint(data_dir)
+    old_store, previous = previous_sequences(store_dir) if incremental else (None, {})
+
+    reused, to_parse, hashes = {}, [], {}
+    for file_name, label, sha1 in sources:
+        path = os.path.join(data_dir, file_name)
+        try:
+            signature = stat_signature(path)
+        except OSError as e:
+            print(f"⚠️ Skipped {file_name}: {e}")
+            continue
+        old = previous.get(file_name)
+        if old is not None and old[0] == signature:
+            reused[file_name] = (signature, old[1], old[2])
+            continue
+        content_hash = sha1 or file_sha1(path)  # Manifest entries already carry theirs
+        if old is not None and old[1] == content_hash:
+            reused[file_name] = (signature, content_hash, old[2])  # Touched but not changed
+            continue
+        hashes[file_name] = (signature, content_hash)
+        to_parse.append((file_name, path, sha1))
+
+    if verbose:
+        print(f"📦 Compiling {len(sources)} sequences from {data_dir} "
+              f"({len(reused)} unchanged, {len(to_parse)} to parse)")
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(to_parse) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(to_parse))) as pool:
+            results = list(pool.map(_read_source, to_parse, chunksize=max(1, len(to_parse) // (4 * workers))))
+    else:
+        results = [_read_source(args) for args in to_parse]
+    parsed = {}
+    for file_name, sequence, error in results:
+        if error is not None:
+            print(f"⚠️ Skipped {file_name}: {error}")
+        elif sequence.ndim != 2 or sequence.shape[1] != NUM_FEATURES or len(sequence) == 0:
+            print(f"⚠️ Skipped {file_name}: unexpected shape {sequence.shape}")
+        else:
+            parsed[file_name] = sequence
+
+    kept_files, signatures, content_hashes, offsets, lengths, labels = [], [], [], [], [], []
+    label_to_index = {}
+    total_frames = 0
+
+    tmp_frames_path = frames_path + ".tmp"
+    with open(tmp_frames_path, "wb") as out:
+        for file_name, label, _ in sources:
+            if file_name in reused:
+                signature, content_hash, old_index = reused[file_name]
+                sequence = old_store[old_index]
+            elif file_name in parsed:
+                signature, content_hash = hashes[file_name]
+                sequence = parsed[file_name]
+            else:
+                continue
+
+            if label not in label_to_index:
+                label_to_index[label] = len(label_to_index)
+
+            out.write(np.ascontiguousarray(sequence).tobytes())
+            kept_files.append(file_name)
+            signatures.append(signature)
+            content_hashes.append(content_hash)
+            offsets.append(total_frames)
+            lengths.append(len(sequence))
+            labels.append(label_to_index[label])
+            total_frames += len(sequence)
+    old_store = sequence = None  # Release the old memory map before it is replaced
+
+    tmp_index_path = index_path + ".tmp.npz"
+    np.savez(
+        tmp_index_path,
+        files=np.array(kept_files, dtype=str),
+        signatures=np.array(signatures, dtype=str),
+        hashes=np.array(content_hashes, dtype=str),
+        offsets=np.array(offsets, dtype=np.int64),
+        lengths=np.array(lengths, dtype=np.int32),
+        labels=np.array(labels, dtype=np.int32),
+        label_names=np.array(list(label_to_index), dtype=str),
+        num_features=np.int32(NUM_FEATURES),
+        fingerprint=np.array(fingerprint),
+    )
+    os.replace(tmp_frames_path, frames_path)
+    os.replace(tmp_index_path, index_path)
+
+    if verbose:
+        print(f"✅ Compiled {len(kept_files)} sequences ({total_frames} frames, "
+              f"{len(label_to_index)} labels) into {store_dir}")
+    return SequenceStore(store_dir)
+
+
+class SequenceStore:
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        index = np.load(os.path.join(store_dir, INDEX_FILE))
+        self.files = index["files"]
+        self.offsets = index["offsets"]
+        self.lengths = index["lengths"]
+        self.labels = index["labels"]
+        self.label_names = [str(name) for name in index["label_names"]]
+        self.num_features = int(index["num_features"])
+        self.fingerprint = str(index["fingerprint"])
+        # Per-recording "size:mtime" and sha1, used to compile the next version incrementally
+        self.signatures = index["signatures"] if "signatures" in index else None
+        self.hashes = index["hashes"] if "hashes" in index else None
+
+        total_frames = int(self.lengths.sum()) if len(self.lengths) else 0
+        frames_path = os.path.join(store_dir, FRAMES_FILE)
+        expected_bytes = total_frames * self.num_features * 4
+        if os.path.getsize(frames_path) != expected_bytes:
+            raise ValueError(f"{frames_path} does not match its index")
+        if total_frames:
+            self.frames = np.memmap(frames_path, dtype=np.float32, mode='r',
+                                    shape=(total_frames, self.num_features))
+        else:
+            self.frames = np.zeros((0, self.num_features), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, i):
+        # Zero-copy view into the memory-mapped frames
+        start = self.offsets[i]
+        return self.frames[start:start + self.lengths[i]]
+
+    def label(self, i):
+        return self.label_names[self.labels[i]]
+
+    @property
+    def max_length(self):
+        return int(self.lengths.max()) if len(self.lengths) else 0
+
+    def index_to_label(self):
+        return {idx: name for idx, name in enumerate(self.label_names)}
+
+
+def load_sequence_store(data_dir=DEFAULT_DATA_DIR, rebuild=False, verbose=True, workers=None):
+    # rebuild parses every recording again instead of reusing the unchanged ones
+    store_dir = os.path.join(data_dir, STORE_DIRNAME)
+    if not rebuild:
+        try:
+            store = SequenceStore(store_dir)
+            current = sources_fingerprint(data_dir)
+            if store.fingerprint == current and store.hashes is not None:  # Older stores lack per-file hashes
+                if verbose:
+                    print(f"📦 Using compiled sequence store ({len(store)} sequences)")
+                return store
+            if verbose:
+                print("🔄 Recordings changed, recompiling sequence store")
+        except (OSError, KeyError, ValueError):
+            pass
+    return compile_store(data_dir, verbose=verbose, workers=workers, incremental=not rebuild)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile sequence_data recordings into a memory-mapped store")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Recompile every recording, even unchanged ones")
+    parser.add_argument("--workers", type=int, help="Processes parsing changed recordings (default: one per CPU)")
+    args = parser.parse_args()
+
+    store = load_sequence_store(args.data_dir, rebuild=args.rebuild, workers=args.workers)
+    print(f"Sequences: {len(store)}, labels: {len(store.label_names)}, "
+          f"frames: {int(store.lengths.sum())}, max length: {store.max_length}")
@@ -0,0 +1,86 @@
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+from sequence_store import MANIFEST_FILE, read_manifest
+
+# Saves recorded sequences without holding up the camera loop.
+# submit() copies the frames and returns at once; a writer thread stores each sequence as a float32
+# .npy file (written to a temp name, then renamed) and only then appends its line to manifest.jsonl,
+# so every manifest entry points at a complete file. Ids continue from the highest one in the manifest,
+# which is read once at startup instead of listing the directory for every save.
+
+
+class SequenceWriter:
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+        self.next_id = max((entry["id"] for entry in read_manifest(data_dir)), default=-1) + 1
+        self._terminate_torn_line()
+        self.queue = queue.Queue()
+        self.written = 0
+        self.failed = 0
+        self.thread = threading.Thread(target=self._run, name="sequence-writer", daemon=True)
+        self.thread.start()
+
+    def _terminate_torn_line(self):
+        # A crash mid-append can leave a partial last line; start the next entry on a line of its own
+        if os.path.exists(self.manifest_path) and os.path.getsize(self.manifest_path):
+            with open(self.manifest_path, "rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def submit(self, label, frames):
+        # The frames are copied, so the caller can reuse its buffer straight away.
+        # Returns the file name the sequence will be saved under.
+        sequence_id = self.next_id
+        self.next_id += 1
+        file_name = f"{label}_{sequence_id}.npy"
+        self.queue.put((sequence_id, label, file_name, np.array(frames, dtype=np.float32)))
+        return file_name
+
+    def _write(self, sequence_id, label, file_name, frames):
+        buffer = io.BytesIO()
+        np.save(buffer, frames)
+        data = buffer.getvalue()
+        path = os.path.join(self.data_dir, file_name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        entry = {
+            "id": sequence_id,
+            "file": file_name,
+            "label": label,
+            "frames": len(frames),
+            "sha1": hashlib.sha1(data).hexdigest(),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(self.manifest_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self._write(*item)
+                self.written += 1
+                print(f"💾 Saved {item[2]} ({len(item[3])} frames)")
+            except OSError as e:
+                self.failed += 1
+                print(f"❌ Could not save {item[2]}: {e}")
+
+    def close(self):
+        # Waits for everything submitted so far to be on disk
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+import pytest
+
+msgpack = pytest.importorskip("msgpack")
+
+
+@pytest.fixture(scope="module")
+def client():
+    # connection.py loads gesture_model.h5 and label_map.npy relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        import connection
+        if not connection.model_ready.is_set():
+            connection.load_model()
+        yield connection.app.test_client()
+    finally:
+        os.chdir(cwd)
+
+
+def test_octet_stream_rejects_two_dimensional_shape(client):
+    data = np.zeros((960, 63), dtype='<f4').tobytes()
+    response = client.post("/predict_batch", data=data, content_type="application/octet-stream",
+                           headers={"X-Shape": "960,63"})
+    assert response.status_code == 400
+
+
+def test_msgpack_rejects_two_dimensional_shape(client):
+    body = msgpack.packb({"shape": [960, 63], "data": np.zeros((960, 63), dtype='<f4').tobytes()})
+    response = client.post("/predict_batch", data=body, content_type="application/msgpack")
+    assert response.status_code == 400
+
+
+def test_msgpack_rejects_empty_dimension(client):
+    body = msgpack.packb({"shape": [0, 30, 63], "data": b""})
+    response = client.post("/predict_batch", data=body, content_type="application/msgpack")
+    assert response.status_code == 400
+
+
+def test_json_rejects_flat_sequence(client):
+    response = client.post("/predict_batch", json={"sequences": [[0.1] * 63]})
+    assert response.status_code == 400
+
+
+def test_msgpack_accepts_valid_shape(client):
+    body = msgpack.packb({"shape": [2, 30, 63], "data": np.full((2, 30, 63), 0.5, dtype='<f4').tobytes()})
+    response = client.post("/predict_batch", data=body, content_type="application/msgpack")
+    assert response.status_code == 200
@@ -1,109 +1,235 @@
+import argparse
+import json
 import os
 import numpy as np #Used for numerical operations llike padding sequences
-import pandas as pd #Used to read CSV files into dataframes
 import tensorflow as tf #Frameworks to build and train machine learning model
 from tensorflow.keras.models import Sequential #Sequential model is a linear stack of layers
-from tensorflow.keras.layers import LSTM, Dense, Masking 
+from tensorflow.keras.layers import LSTM, Dense, Masking
 #LSTM -> A type or recurrent neural network layer that can process sequences, has memory that remembers from earlier sequences
 #Dense is a regular fully connected neuron network layer where every neuron is connected to every neuron in other layers
 #Masking is a special layer used to handle padded seq, if they have diff length, pad them into the same length
 
-data_dir = 'sequence_data'
-sequences = [] #Store the gesture data sequences
-labels = [] #Store gesture labels
-label_to_index = {} #Dictionary mapping labels
-index_to_label = {}
-label_counter = 0 #Tracks how many unique labels present
-max_sequence_length = 0 #Tracks the longest sequence for padding purposes
-
-# Print out what we're doing
-print("Loading sequence data...")
-
-for file in os.listdir(data_dir):
-    if file.endswith(".csv"):
-        file_path = os.path.join(data_dir, file)
-        df = pd.read_csv(file_path, header=None) #os.path.join ensures that path separator works for any OS, pandas by default treats 1st row as column names, hence need None
-        
-        # Get the label from the file name (more reliable method)
-        label = file.split('_')[0]  # Extract label from filename (assuming format "label_xxx.csv")
-        print(f"Processing file: {file}, Label: {label}")
+from sequence_store import load_sequence_store #Compiled, memory-mapped copy of sequence_data
+from export_weights import export_weights #Writes gesture_weights.npz for the NumPy inference engine
+from input_pipeline import make_dataset #Streams sequences from the store with augmentation, length bucketing and prefetch
 
+data_dir = 'sequence_data'
+model_path = 'gesture_model.h5'
+label_map_path = 'label_map.npy'
+trained_sequences_path = 'trained_sequences.json' #Which recordings the saved model has already seen
+
+
+def load_training_data(data_dir=data_dir):
+    # Print out what we're doing
+    print("Loading sequence data...")
+
+    #The store packs every CSV into one float32 file and only re-parses them when sequence_data changes
+    store = load_sequence_store(data_dir)
+    index_to_label = store.index_to_label()
+
+    print(f"Found {len(store)} sequences with {len(index_to_label)} unique labels")
+    print(f"Labels: {index_to_label}")
+    print(f"Maximum sequence length: {store.max_length}")
+    return store, index_to_label
+
+
+def pad_to_max_length(store):
+    #Neural networks require fixed-size inputs for processing, if we have 2 gestures with timestamp diff of 10, with 3 features each,
+    #seq.shape[1] gives 3 therefore we are creating a 10x3 array of zeros
+    #Every sequence is padded to the single longest one, so most of X ends up being padding
+    max_sequence_length = store.max_length
+    padded_sequences = []
+    for i in range(len(store)):
+        seq = store[i]
+        padding = np.zeros((max_sequence_length - len(seq), seq.shape[1]))
+        padded_seq = np.vstack((seq,padding)) #Will then vertically stack the original matrix with this padding matrix to make them uniform
+        padded_sequences.append(padded_seq)
+    return np.array(padded_sequences) #Converts this into a numpy array
+
+
+def build_model(timesteps, num_features, num_classes):
+    #Argument for Sequential are the layers of data
+    #Masking tells model to ignore padded parts of the sequence
+    #LSTM(64) adds a long short term memory layer with 64 hidden units to learn temporal patterns
+    #Dense(units, activation='softmax') outputs probabilities over the classes
+    #timesteps=None lets every batch have its own length, which is what bucketed training needs
+    model = Sequential([
+        Masking(mask_value=0.0, input_shape=(timesteps, num_features)), #mask_value=0.0 ignores frames thatr are all 0s. num_features is the number of features per frame
+        LSTM(64),
+        Dense(num_classes, activation='softmax')#1st para is the number of output classes, 2nd para converts raw scores to prob diist over class
+    ])
+
+    #Configuring of model for training
+    '''
+    model.compile sets model to learn by
+    1) Adjusting its weights(Optimiser)
+    2)What error to minimize(loss function)
+    3)What progress to report(metrics)
+
+    A neural network learns by adjusting weights based on how wrong its predictions are -> Optimiser determines how big/small adjustments are
+    #Adam means Adaptive Moment Estimation -> Adjusts the learning rate automatically
+
+    Loss function measures how far off the model's predictions are from the correct answers
+    Categorical cross-entropy compares outputted probabilities to the correct one-hot label
+
+    Metrics tells us how well the model is performing
+    metrics is telling TensorFlow to track and report how often the model gets the label correctly
+    '''
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def export_for_inference(model, max_sequence_length, num_features, num_classes, path=model_path):
+    #connection.py and live_predict.py read the window length from model.input_shape[1],
+    #so the saved model gets a fixed length even though training used variable-length batches
+    inference_model = build_model(max_sequence_length, num_features, num_classes)
+    inference_model.set_weights(model.get_weights())
+    inference_model.save(path)
+    export_weights(path)
+
+
+def grow_output_layer(old_model, new_model):
+    #Copy the LSTM as is and the Dense weights for the classes the old model already knew.
+    #Columns for new classes keep new_model's fresh initialisation, so old predictions are unchanged at the start
+    new_model.layers[-2].set_weights(old_model.layers[-2].get_weights())
+    old_kernel, old_bias = old_model.layers[-1].get_weights()
+    kernel, bias = new_model.layers[-1].get_weights()
+    known = old_kernel.shape[1]
+    kernel[:, :known] = old_kernel
+    bias[:known] = old_bias
+    new_model.layers[-1].set_weights([kernel, bias])
+
+
+def save_trained_sequences(files):
+    with open(trained_sequences_path, "w") as f:
+        json.dump(sorted(files), f, indent=2)
+
+
+def fine_tune(store, args):
+    #Incremental mode: start from the saved model and only train on new recordings plus a few replayed old ones
+    old_model = tf.keras.models.load_model(model_path)
+    label_map = np.load(label_map_path, allow_pickle=True).item() if os.path.exists(label_map_path) else {}
+    known_classes = old_model.output_shape[-1]
+    if store.num_features != old_model.input_shape[-1]:
+        raise ValueError(f"{model_path} expects {old_model.input_shape[-1]} features, sequence_data has {store.num_features}")
+
+    #Keep existing indices (collecting_sign_data.py may already have added new labels) and append any others
+    label_to_index = {label: idx for idx, label in label_map.items()}
+    for label in store.label_names:
         if label not in label_to_index:
-            label_to_index[label] = label_counter
-            index_to_label[label_counter] = label
-            print(f"Added new label: {label} with index {label_counter}")
-            label_counter += 1
-        
-        # Get features (all columns except the last one)
-        sequence = df.iloc[:,:-1].to_numpy() #This will drop the label column and keep only numeric features, and convert them to numpy array
-        sequences.append(sequence)
-        labels.append(label_to_index[label])
-
-        if len(sequence) > max_sequence_length:
-            max_sequence_length = len(sequence)
-
-print(f"Found {len(sequences)} sequences with {label_counter} unique labels")
-print(f"Labels: {index_to_label}")
-print(f"Maximum sequence length: {max_sequence_length}")
-
-#Neural networks require fixed-size inputs for processing, if we have 2 gestures with timestamp diff of 10, with 3 features each, 
-#seq.shape[1] gives 3 therefore we are creating a 10x3 array of zeros
-padded_sequences = []
-for seq in sequences:
-    padding = np.zeros((max_sequence_length - len(seq), seq.shape[1]))
-    padded_seq = np.vstack((seq,padding)) #Will then vertically stack the original matrix with this padding matrix to make them uniform
-    padded_sequences.append(padded_seq)
-X = np.array(padded_sequences) #Converts this into a numpy array
-#one-hot encoding converts category labels into numeric vectors for models to understand since using numnbers may make model think there is order
-#to_categorical() converts lists into one-hot encoded vector. num_class tells TensorFlow how many distinct labels exist in dataset and how long one-hot vector should be
-#Example of one-hot vector: [0,1]
-y = tf.keras.utils.to_categorical(labels, num_classes = len(label_to_index))
-
-print(f"Input shape: {X.shape}")
-print(f"Output shape: {y.shape}")
-
-#Argument for Sequential are the layers of data
-#Masking tells model to ignore padded parts of the sequence
-#LSTM(64) adds a long short term memory layer with 64 hidden units to learn temporal patterns
-#Dense(units, activation='softmax') outputs probabilities over the classes
-model = Sequential([
-    Masking(mask_value=0.0, input_shape=(max_sequence_length, X.shape[2])), #mask_value=0.0 ignores frames thatr are all 0s.X.shape[2] is the number of features per frame
-    LSTM(64),
-    Dense(len(label_to_index), activation='softmax')#1st para is the number of output classes, 2nd para converts raw scores to prob diist over class
-])
-
-#Configuring of model for training
-'''
-model.compile sets model to learn by 
-1) Adjusting its weights(Optimiser)
-2)What error to minimize(loss function)
-3)What progress to report(metrics)
-
-A neural network learns by adjusting weights based on how wrong its predictions are -> Optimiser determines how big/small adjustments are
-#Adam means Adaptive Moment Estimation -> Adjusts the learning rate automatically
-
-Loss function measures how far off the model's predictions are from the correct answers
-Categorical cross-entropy compares outputted probabilities to the correct one-hot label
-
-Metrics tells us how well the model is performing
-metrics is telling TensorFlow to track and report how often the model gets the label correctly
-'''
-model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-
-#An epoch is 1 full pass through all the training data
-model.fit(X,y, epochs=50) #In essence going through datasets 50 times. Can also specify number of data processed at anytime with batch_size
-
-model.save('gesture_model.h5')
-
-# Create the correct label map for prediction - this is the critical fix!
-# We need a map from index to label name, not what was previously saved
-label_map = {}
-for idx, label in index_to_label.items():
-    label_map[idx] = label
-
-print("Saving label map:")
-print(label_map)
-np.save('label_map.npy', label_map)
-
-print("Model training complete and saved as 'gesture_model.h5'.")
-print("Label map saved as 'label_map.npy'")
\ No newline at end of file
+            label_to_index[label] = len(label_to_index)
+    num_classes = max(len(label_to_index), known_classes)
+    labels = np.array([label_to_index[store.label(i)] for i in range(len(store))], dtype=np.int32)
+
+    files = [str(f) for f in store.files]
+    if os.path.exists(trained_sequences_path):
+        with open(trained_sequences_path) as f:
+            trained = set(json.load(f))
+    else:
+        #No record yet, so assume everything with a label the model already outputs was trained on
+        print(f"⚠️ {trained_sequences_path} not found, treating all sequences of known labels as trained")
+        trained = {files[i] for i in range(len(store)) if labels[i] < known_classes}
+
+    new_indices = np.array([i for i in range(len(store)) if files[i] not in trained], dtype=np.int64)
+    if len(new_indices) == 0:
+        print("✅ No new sequences since the last training run, nothing to do")
+        return
+
+    #Replay a few old recordings of every label so the model does not forget them
+    rng = np.random.default_rng()
+    old_indices = np.array([i for i in range(len(store)) if files[i] in trained], dtype=np.int64)
+    replay = []
+    for label in np.unique(labels[old_indices]):
+        members = old_indices[labels[old_indices] == label]
+        replay.extend(rng.choice(members, size=min(args.replay_per_label, len(members)), replace=False))
+
+    new_labels = sorted({label for label, idx in label_to_index.items() if idx >= known_classes})
+    print(f"➕ {len(new_indices)} new sequences, {len(replay)} replayed, new labels: {new_labels or 'none'}")
+
+    model = build_model(None, store.num_features, num_classes)
+    grow_output_layer(old_model, model)
+
+    #New recordings are repeated so they are not drowned out by the replay samples; augmentation keeps the copies different
+    indices = np.concatenate([np.repeat(new_indices, args.new_repeats), np.array(replay, dtype=np.int64)])
+    train_data = make_dataset(store, indices, num_classes, batch_size=args.batch_size,
+                              num_buckets=args.buckets, augment=not args.no_augment, labels=labels)
+    model.fit(train_data, epochs=args.epochs or 5)
+
+    max_sequence_length = max(old_model.input_shape[1], int(store.lengths[new_indices].max()))
+    export_for_inference(model, max_sequence_length, store.num_features, num_classes)
+
+    label_map = {idx: label for label, idx in label_to_index.items()}
+    np.save(label_map_path, label_map)
+    save_trained_sequences(trained | {files[i] for i in new_indices})
+
+    print(f"Model fine-tuned and saved as '{model_path}' ({known_classes} → {num_classes} classes).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the gesture LSTM on sequence_data")
+    parser.add_argument("--epochs", type=int, help="Defaults to 50, or 5 with --incremental")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--buckets", type=int, default=8, help="Number of length buckets")
+    parser.add_argument("--padded", action="store_true",
+                        help="Pad every sequence to the global max length instead of bucketing")
+    parser.add_argument("--no-augment", action="store_true",
+                        help="Disable jitter, time-warp and mirroring augmentation")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fine-tune the saved model on new recordings instead of retraining from scratch")
+    parser.add_argument("--replay-per-label", type=int, default=2,
+                        help="Old sequences per label mixed into incremental fine-tuning")
+    parser.add_argument("--new-repeats", type=int, default=4,
+                        help="How many times each new sequence appears per incremental epoch")
+    args = parser.parse_args()
+
+    store, index_to_label = load_training_data()
+    if args.incremental and os.path.exists(model_path):
+        fine_tune(store, args)
+        return
+    if args.incremental:
+        print(f"⚠️ {model_path} not found, running a full training instead")
+
+    epochs = args.epochs or 50
+    num_classes = len(index_to_label)
+    max_sequence_length = store.max_length
+
+    if args.padded:
+        X = pad_to_max_length(store)
+        #one-hot encoding converts category labels into numeric vectors for models to understand since using numnbers may make model think there is order
+        #to_categorical() converts lists into one-hot encoded vector. num_class tells TensorFlow how many distinct labels exist in dataset and how long one-hot vector should be
+        #Example of one-hot vector: [0,1]
+        y = tf.keras.utils.to_categorical(store.labels, num_classes = num_classes)
+        print(f"Input shape: {X.shape}")
+        print(f"Output shape: {y.shape}")
+
+        model = build_model(max_sequence_length, store.num_features, num_classes)
+        #An epoch is 1 full pass through all the training data
+        model.fit(X,y, epochs=epochs, batch_size=args.batch_size) #In essence going through datasets 50 times
+    else:
+        #Sequences are read lazily from the memory-mapped store, so memory does not grow with the dataset
+        train_data = make_dataset(store, range(len(store)), num_classes, batch_size=args.batch_size,
+                                  num_buckets=args.buckets, augment=not args.no_augment)
+        print(f"Streaming {len(store)} sequences (augmentation {'off' if args.no_augment else 'on'})")
+
+        model = build_model(None, store.num_features, num_classes)
+        model.fit(train_data, epochs=epochs)
+
+    export_for_inference(model, max_sequence_length, store.num_features, num_classes)
+
+    # Create the correct label map for prediction - this is the critical fix!
+    # We need a map from index to label name, not what was previously saved
+    label_map = {}
+    for idx, label in index_to_label.items():
+        label_map[idx] = label
+
+    print("Saving label map:")
+    print(label_map)
+    np.save(label_map_path, label_map)
+    save_trained_sequences(str(f) for f in store.files)
+
+    print("Model training complete and saved as 'gesture_model.h5'.")
+    print("Label map saved as 'label_map.npy'")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,9 @@ function LivePredictionDisplay() {
   const [confidence, setConfidence] = useState(0.0);
 
   useEffect(() => {
-    const socket = io('http://localhost:5001');
+    // Only predictions from the live_predict.py session named in ?session= (or "default") are delivered
+    const session = new URLSearchParams(window.location.search).get('session') || 'default';
+    const socket = io('http://localhost:5001', { query: { session } });
 
     socket.on('connect', () => {
       console.log('✅ React connected to backend WebSocket');